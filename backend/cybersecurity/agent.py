@@ -1,6 +1,6 @@
 # backend/agent.py
 import os
-import json
+import orjson
 from typing import TypedDict
 from langchain_groq import ChatGroq # <--- CHANGE: Import ChatGroq
 from langgraph.graph import StateGraph, END
@@ -16,24 +16,20 @@ class AgentState(TypedDict):
 # --- CHANGE: Initialize the LLM using Groq and the Llama 3 model ---
 # We are using Llama 3's 8B parameter model, which is fast and powerful.
 groq_api_key = os.getenv("GROQ_API_KEY")
+MODEL_NAME = "llama-3.1-8b-instant"
 
-# Initialize the ChatGroq client with the API key
-agent_app = ChatGroq(
+# Initialize the ChatGroq client once at import; every graph run reuses it
+# (and its pooled HTTP connections). agent_app below is the compiled graph.
+_llm = ChatGroq(
     api_key=groq_api_key,
     temperature=0,
-    model_name="llama-3.1-8b-instant"
-) 
+    model_name=MODEL_NAME
+)
 
 # -----------------------------------------------------------------
 
-# The agent's node function remains exactly the same.
-# The prompt is compatible with Llama 3.
-def analyze_scenario(state: AgentState):
-    """Analyzes the weather scenario and provides a recommendation."""
-    scenario = state['scenario']
-    print(f"---ANALYZING SCENARIO WITH GROQ/LLAMA3: {scenario}---")
-
-    prompt = f"""
+# Scenario prompt, built once at import; analyze_scenario only fills it in.
+_PROMPT_TEMPLATE = """
     You are an AI for the Mumbai Smart City Dashboard.
     Your task is to recommend changes to the city's smart light pole brightness based on a weather scenario.
     The brightness scale is 0 (off) to 100 (max brightness).
@@ -48,14 +44,32 @@ def analyze_scenario(state: AgentState):
     Provide your output as a simple JSON object with a single key "brightness".
     Example: {{"brightness": 90}}
     """
+
+def _strip_code_fence(text: str) -> str:
+    """Returns the body of a ```json ... ``` markdown block, or the text itself."""
+    if "```" not in text:
+        return text
+    body = text.partition("```")[2]
+    if body.startswith("json"):
+        body = body[4:]
+    return body.partition("```")[0]
+
+# The agent's node function remains exactly the same.
+# The prompt is compatible with Llama 3.
+def analyze_scenario(state: AgentState):
+    """Analyzes the weather scenario and provides a recommendation."""
+    # Repeated scenarios are served by main.run_agent_cached (AGENT_CACHE_TTL),
+    # so every call that reaches this node goes to the model.
+    scenario = state['scenario']
+    print(f"---ANALYZING SCENARIO WITH GROQ/LLAMA3: {scenario}---")
+
+    prompt = _PROMPT_TEMPLATE.format(scenario=scenario)
     
-    response = llm.invoke(prompt)
+    response = _llm.invoke(prompt)
     try:
-        # Clean up the response which might be in a markdown block
-        cleaned_response = response.content.strip().replace('```json', '').replace('```', '')
-        recommendation = json.loads(cleaned_response)
+        recommendation = orjson.loads(_strip_code_fence(response.content))
         return {"recommendation": recommendation}
-    except json.JSONDecodeError:
+    except orjson.JSONDecodeError:
         print("Error: Failed to decode LLM response into JSON.")
         return {"recommendation": {"brightness": 60}} # Default fallback
 
@@ -1,6 +1,11 @@
 # backend/main.py
-import json
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect
+import asyncio
+import time
+from collections import Counter, defaultdict, deque
+from itertools import islice
+from typing import Optional, Dict, Deque, List, Tuple
+import orjson
+from fastapi import FastAPI, WebSocket, WebSocketDisconnect, HTTPException, Response
 from websocket_manager import manager
 from fastapi.middleware.cors import CORSMiddleware
 from agent import agent_app  # Weather agent - keeping existing
@@ -10,7 +15,8 @@ from cyber_agents import create_soar_app, SecurityState  # New cyber agents
 from models import DashboardState, Zone, LightPole, SimulationRequest, OverrideRequest
 from cyber_models import (
     CyberZone, CyberDashboardState, CyberEvent, 
-    CyberSimulationRequest, CyberIncident
+    CyberSimulationRequest, CyberIncident,
+    SeverityEnum, IncidentStatusEnum
 )
 
 app = FastAPI(
@@ -60,6 +66,18 @@ MOCK_DASHBOARD_STATE = DashboardState(
     ]
 )
 
+# Live weather state as plain JSON-ready dicts. Write paths patch these in
+# place and the dict is encoded directly, so a change never re-walks the
+# Pydantic models with model_dump(); the models only validate the seed data.
+WEATHER_STATE: dict = MOCK_DASHBOARD_STATE.model_dump(mode="json")
+
+# Pole lookup by id (the pole set is fixed, so the index never goes stale)
+POLE_INDEX: Dict[str, dict] = {pole["id"]: pole for zone in WEATHER_STATE["zones"] for pole in zone["poles"]}
+
+# Poles the agent may dim/brighten. Nothing changes pole status at runtime,
+# so this is computed once instead of scanning every zone per simulation.
+ONLINE_POLES: List[dict] = [pole for pole in POLE_INDEX.values() if pole["status"] == "ONLINE"]
+
 # ==================== NEW CYBERSECURITY DATA ====================
 
 # Mock data for cybersecurity zones
@@ -125,6 +143,86 @@ MOCK_CYBER_STATE = CyberDashboardState(
     recent_events=[]
 )
 
+# Per-zone view of recent events so zone queries don't filter the global list.
+# The deques only hold the last ZONE_EVENTS_MAXLEN events for the last-N
+# slices; the counters keep the zone totals exact, matching the global list.
+ZONE_EVENTS_MAXLEN = 500
+EVENTS_BY_ZONE: Dict[str, Deque[CyberEvent]] = defaultdict(lambda: deque(maxlen=ZONE_EVENTS_MAXLEN))
+ZONE_EVENT_COUNTS: Counter = Counter()
+ZONE_SEVERE_EVENT_COUNTS: Counter = Counter()  # HIGH and CRITICAL only
+
+# ==================== CACHED PAYLOADS ====================
+
+# Encoded snapshots of the mock states, built lazily and dropped whenever
+# the matching state is mutated. The WebSocket "initial_state" message is
+# spliced from both, so neither tree is dumped more than once per change.
+_weather_bytes: Optional[bytes] = None
+_cyber_bytes: Optional[bytes] = None
+_initial_state_bytes: Optional[bytes] = None
+
+def invalidate_weather_cache():
+    """Drop cached payloads after WEATHER_STATE changes"""
+    global _weather_bytes, _initial_state_bytes
+    _weather_bytes = None
+    _initial_state_bytes = None
+
+def invalidate_cyber_cache():
+    """Drop cached payloads after MOCK_CYBER_STATE changes"""
+    global _cyber_bytes, _initial_state_bytes
+    _cyber_bytes = None
+    _initial_state_bytes = None
+
+def weather_payload() -> bytes:
+    """Get the encoded weather dashboard state"""
+    global _weather_bytes
+    if _weather_bytes is None:
+        _weather_bytes = orjson.dumps(WEATHER_STATE)
+    return _weather_bytes
+
+def cyber_payload() -> bytes:
+    """Get the encoded cybersecurity dashboard state"""
+    global _cyber_bytes
+    if _cyber_bytes is None:
+        _cyber_bytes = orjson.dumps(MOCK_CYBER_STATE.model_dump(mode="json"))
+    return _cyber_bytes
+
+def initial_state_bytes() -> bytes:
+    """Get the encoded initial_state message, rebuilding it if stale"""
+    global _initial_state_bytes
+    if _initial_state_bytes is None:
+        _initial_state_bytes = (
+            b'{"type":"initial_state","weather":' + weather_payload()
+            + b',"cyber":' + cyber_payload() + b'}'
+        )
+    return _initial_state_bytes
+
+# ==================== AGENT RESULT CACHE ====================
+
+# Repeating a simulation with the same inputs reuses the previous agent run
+# for a short window instead of calling the LLM again.
+AGENT_CACHE_TTL = 60.0  # seconds
+AGENT_CACHE_MAXSIZE = 128
+_agent_cache: Dict[bytes, Tuple[float, dict]] = {}
+
+# The LLM pipelines are synchronous, so they run in worker threads to keep the
+# event loop free; the semaphore caps how many hit the Groq API at once.
+MAX_CONCURRENT_AGENTS = 4
+_agent_slots = asyncio.Semaphore(MAX_CONCURRENT_AGENTS)
+
+async def run_agent_cached(inputs: dict) -> dict:
+    """Run the weather agent, serving repeats of the same inputs from the cache"""
+    key = orjson.dumps(inputs, option=orjson.OPT_SORT_KEYS)
+    now = time.monotonic()
+    cached = _agent_cache.pop(key, None)
+    if cached is None or cached[0] <= now:
+        async with _agent_slots:
+            result = await asyncio.to_thread(agent_app.invoke, inputs)
+        cached = (now + AGENT_CACHE_TTL, result)
+        if len(_agent_cache) >= AGENT_CACHE_MAXSIZE:
+            _agent_cache.pop(next(iter(_agent_cache)))  # evict least recently used
+    _agent_cache[key] = cached
+    return cached[1]
+
 # ==================== BASE ENDPOINTS ====================
 
 @app.get("/")
@@ -141,34 +239,36 @@ def health_check():
 
 # ==================== WEATHER ENDPOINTS (EXISTING) ====================
 
-@app.get("/api/v1/dashboard/initial-state", response_model=DashboardState)
+@app.get("/api/v1/dashboard/initial-state")
 async def get_initial_state():
     """Get initial weather dashboard state"""
-    return MOCK_DASHBOARD_STATE
+    return Response(content=weather_payload(), media_type="application/json")
 
 @app.post("/api/v1/simulation/weather")
 async def simulate_weather(request: SimulationRequest):
     """Simulate weather scenario and adjust light poles"""
     # 1. Invoke the LangGraph agent with the scenario
     inputs = {"scenario": request.scenario}
-    result = agent_app.invoke(inputs)
+    result = await run_agent_cached(inputs)
     recommendation = result.get('recommendation', {})
     new_brightness = recommendation.get('brightness')
 
     # 2. Update the system's state based on the agent's recommendation
     if new_brightness is not None:
         print(f"Agent recommended brightness: {new_brightness}%. Updating state.")
-        for zone in MOCK_DASHBOARD_STATE.zones:
-            for pole in zone.poles:
-                if pole.status == "ONLINE":
-                    pole.brightness = new_brightness
-    
-    # 3. Broadcast the updated state to all connected frontend clients
-    updated_state_dict = MOCK_DASHBOARD_STATE.dict()
-    await manager.broadcast(json.dumps({
-        "type": "weather_update",
-        "data": updated_state_dict
-    }))
+        updated_pole_ids = []
+        for pole in ONLINE_POLES:
+            if not pole["manual_override"]:  # operator overrides take precedence
+                pole["brightness"] = new_brightness
+                updated_pole_ids.append(pole["id"])
+        invalidate_weather_cache()
+
+        # 3. Broadcast only what changed; clients patch their local state
+        await manager.broadcast(orjson.dumps({
+            "type": "brightness_update",
+            "pole_ids": updated_pole_ids,
+            "brightness": new_brightness
+        }))
 
     return {"message": "Simulation successful", "new_brightness": new_brightness}
 
@@ -176,29 +276,30 @@ async def simulate_weather(request: SimulationRequest):
 async def set_manual_override(pole_id: str, request: OverrideRequest):
     """Manual override for light pole brightness"""
     # Find the pole and update its state in our mock data
-    for zone in MOCK_DASHBOARD_STATE.zones:
-        for pole in zone.poles:
-            if pole.id == pole_id:
-                pole.manual_override = request.manual_override
-                pole.brightness = request.brightness
-                print(f"Overriding pole {pole_id} to brightness {pole.brightness}")
-                break
+    pole = POLE_INDEX.get(pole_id)
+    if pole is None:
+        raise HTTPException(status_code=404, detail="Pole not found")
+    pole["manual_override"] = request.manual_override
+    pole["brightness"] = request.brightness
+    print(f"Overriding pole {pole_id} to brightness {request.brightness}")
+    invalidate_weather_cache()
     
-    # Broadcast the change to all clients
-    updated_state_dict = MOCK_DASHBOARD_STATE.dict()
-    await manager.broadcast(json.dumps({
-        "type": "weather_update",
-        "data": updated_state_dict
+    # Broadcast just the changed pole to all clients
+    await manager.broadcast(orjson.dumps({
+        "type": "pole_update",
+        "pole_id": pole_id,
+        "brightness": request.brightness,
+        "manual_override": request.manual_override
     }))
     
     return {"success": True, "pole_id": pole_id}
 
 # ==================== CYBERSECURITY ENDPOINTS (NEW) ====================
 
-@app.get("/api/v1/cyber/initial-state", response_model=CyberDashboardState)
+@app.get("/api/v1/cyber/initial-state")
 async def get_cyber_initial_state():
     """Get initial cybersecurity dashboard state"""
-    return MOCK_CYBER_STATE
+    return Response(content=cyber_payload(), media_type="application/json")
 
 @app.get("/api/v1/cyber/zones/{zone_id}/details")
 async def get_zone_details(zone_id: str):
@@ -208,17 +309,17 @@ async def get_zone_details(zone_id: str):
         return {"error": "Zone not found"}
     
     # Get recent events for this zone
-    zone_events = [e for e in MOCK_CYBER_STATE.recent_events if e.zone_id == zone_id]
+    zone_events = EVENTS_BY_ZONE.get(zone_id, ())
     
     # Get active incidents for this zone
     zone_incidents = [i for i in MOCK_CYBER_STATE.active_incidents if i.zone_id == zone_id]
     
     return {
         "zone": zone.dict(),
-        "recent_events": [e.dict() for e in zone_events[-10:]],  # Last 10 events
+        "recent_events": [e.dict() for e in last_n_events(zone_events, 10)],  # Last 10 events
         "active_incidents": [i.dict() for i in zone_incidents],
         "metrics": {
-            "total_events_24h": len([e for e in zone_events if e.severity in ["HIGH", "CRITICAL"]]),
+            "total_events_24h": ZONE_SEVERE_EVENT_COUNTS[zone_id],
             "avg_response_time": 2.5,  # Simulated metric in minutes
             "compliance_score": 95 if zone.compliance_status == "COMPLIANT" else 70
         }
@@ -245,23 +346,26 @@ async def simulate_cyber_attack(request: CyberSimulationRequest):
     
     # Create incident record
     incident_id = hashlib.md5(f"{request.zone_id}_{datetime.now().isoformat()}".encode()).hexdigest()[:12]
-    incident = CyberIncident(
+    # Server-built records skip validation; enum fields are set explicitly
+    incident = CyberIncident.model_construct(
         incident_id=incident_id,
         zone_id=request.zone_id,
-        attack_type=request.attack_type,
+        attack_type=request.attack_type.value,
         severity=request.severity,
-        status="ACTIVE",
+        status=IncidentStatusEnum.ACTIVE,
         detected_at=datetime.now().isoformat(),
         mitigated_at=None
     )
     MOCK_CYBER_STATE.active_incidents.append(incident)
+    invalidate_cyber_cache()
     
     # Broadcast RED state immediately
-    await manager.broadcast(json.dumps({
+    await manager.broadcast(orjson.dumps({
         "type": "cyber_alert",
         "data": {
             "zone_id": request.zone_id,
             "security_state": SecurityState.RED.value,
+            "threat_level": zone.threat_level,
             "incident_id": incident_id,
             "message": f"Active threat detected in {zone.name}"
         }
@@ -271,18 +375,20 @@ async def simulate_cyber_attack(request: CyberSimulationRequest):
     attack_telemetry = generate_attack_telemetry(request.attack_type, request.severity)
     
     # Process through SOAR pipeline
-    result = soar_pipeline.process_security_event(
-        zone_id=request.zone_id,
-        zone_type=zone.zone_type,
-        raw_telemetry=attack_telemetry
-    )
+    async with _agent_slots:
+        result = await asyncio.to_thread(
+            soar_pipeline.process_security_event,
+            zone_id=request.zone_id,
+            zone_type=zone.zone_type,
+            raw_telemetry=attack_telemetry
+        )
     
     # Update zone based on SOAR results
     zone.security_state = result.get('security_state', SecurityState.YELLOW.value)
     if result.get('validation_results', {}).get('validation_passed', False):
         zone.threat_level = "LOW"
         zone.active_incidents = max(0, zone.active_incidents - 1)
-        incident.status = "MITIGATED"
+        incident.status = IncidentStatusEnum.MITIGATED
         incident.mitigated_at = datetime.now().isoformat()
         # Remove from active incidents
         MOCK_CYBER_STATE.active_incidents = [
@@ -293,23 +399,29 @@ async def simulate_cyber_attack(request: CyberSimulationRequest):
     
     # Add to recent events
     for anomaly in result.get('anomalies', [])[:5]:  # Add first 5 anomalies as events
-        event = CyberEvent(
+        event = CyberEvent.model_construct(
             event_id=hashlib.md5(f"{anomaly}_{datetime.now().isoformat()}".encode()).hexdigest()[:8],
             zone_id=request.zone_id,
             event_type=anomaly.get('type', 'unknown'),
-            severity=anomaly.get('severity', 'MEDIUM'),
+            severity=SeverityEnum(anomaly.get('severity', 'MEDIUM')),
             description=f"Anomaly detected: {anomaly.get('type', 'unknown')}",
             timestamp=datetime.now().isoformat(),
             source_ip=anomaly.get('source_ip', 'unknown')
         )
         MOCK_CYBER_STATE.recent_events.append(event)
+        EVENTS_BY_ZONE[request.zone_id].append(event)
+        ZONE_EVENT_COUNTS[request.zone_id] += 1
+        if event.severity in ["HIGH", "CRITICAL"]:
+            ZONE_SEVERE_EVENT_COUNTS[request.zone_id] += 1
+    invalidate_cyber_cache()
     
     # Broadcast final state
-    await manager.broadcast(json.dumps({
+    await manager.broadcast(orjson.dumps({
         "type": "cyber_update",
         "data": {
             "zone_id": request.zone_id,
             "security_state": zone.security_state,
+            "threat_level": zone.threat_level,
             "incident_id": incident_id,
             "threat_neutralized": result.get('validation_results', {}).get('validation_passed', False),
             "time_to_mitigation": result.get('time_to_mitigation', 0),
@@ -347,14 +459,16 @@ async def get_incidents(active_only: bool = False):
 async def get_event_stream(zone_id: str = None, limit: int = 50):
     """Get recent security events (optionally filtered by zone)"""
     events = MOCK_CYBER_STATE.recent_events
+    total_count = len(events)
     
     if zone_id:
-        events = [e for e in events if e.zone_id == zone_id]
+        events = EVENTS_BY_ZONE.get(zone_id, ())
+        total_count = ZONE_EVENT_COUNTS[zone_id]
     
     # Return most recent events
     return {
-        "events": [e.dict() for e in events[-limit:]],
-        "total_count": len(events)
+        "events": [e.dict() for e in last_n_events(events, limit)],
+        "total_count": total_count
     }
 
 # ==================== WEBSOCKET ENDPOINT (SHARED) ====================
@@ -364,12 +478,8 @@ async def websocket_endpoint(websocket: WebSocket):
     """WebSocket endpoint for real-time updates (both weather and cyber)"""
     await manager.connect(websocket)
     try:
-        # Send initial states upon connection
-        await websocket.send_json({
-            "type": "initial_state",
-            "weather": MOCK_DASHBOARD_STATE.dict(),
-            "cyber": MOCK_CYBER_STATE.dict()
-        })
+        # Send initial states upon connection (pre-encoded, shared by all clients)
+        await manager.send(websocket, initial_state_bytes())
         
         # Keep connection alive
         while True:
@@ -382,94 +492,121 @@ async def websocket_endpoint(websocket: WebSocket):
 
 # ==================== HELPER FUNCTIONS ====================
 
+def last_n_events(events, n: int) -> list:
+    """Return the newest n events in chronological order, walking only n items"""
+    return list(islice(reversed(events), max(n, 0)))[::-1]
+
 def generate_attack_telemetry(attack_type: str, severity: str) -> list:
     """Generate simulated attack telemetry based on attack type"""
     from datetime import datetime, timedelta
     import random
     
-    telemetry = []
-    base_ip = f"10.{random.randint(0, 255)}.{random.randint(0, 255)}.{random.randint(1, 254)}"
+    # One generator per call; per-record values are drawn in batches below
+    rng = random.Random()
+    now = datetime.now()
+    base_ip = f"10.{rng.randint(0, 255)}.{rng.randint(0, 255)}.{rng.randint(1, 254)}"
+
+    def timestamps(count: int, step: timedelta) -> list:
+        return [(now - step * i).isoformat() for i in range(count)]
     
     if attack_type == "ransomware":
         # Simulate ransomware indicators
-        for i in range(10):
-            telemetry.append({
-                'timestamp': (datetime.now() - timedelta(seconds=i*5)).isoformat(),
-                'source_ip': base_ip,
-                'destination_ip': f"192.168.1.{random.randint(1, 254)}",
-                'event_type': random.choice(['file_encryption', 'anomalous_traffic', 'suspicious_process']),
-                'severity': severity,
-                'description': 'Potential ransomware activity detected - files being encrypted',
-                'port': random.choice([445, 3389, 135])
-            })
+        n = 10
+        hosts = rng.choices(range(1, 255), k=n)
+        event_types = rng.choices(['file_encryption', 'anomalous_traffic', 'suspicious_process'], k=n)
+        ports = rng.choices([445, 3389, 135], k=n)
+        telemetry = [{
+            'timestamp': ts,
+            'source_ip': base_ip,
+            'destination_ip': f"192.168.1.{host}",
+            'event_type': event_type,
+            'severity': severity,
+            'description': 'Potential ransomware activity detected - files being encrypted',
+            'port': port
+        } for ts, host, event_type, port in zip(timestamps(n, timedelta(seconds=5)), hosts, event_types, ports)]
     
     elif attack_type == "brute_force":
         # Simulate brute force attack
-        for i in range(20):
-            telemetry.append({
-                'timestamp': (datetime.now() - timedelta(seconds=i*2)).isoformat(),
-                'source_ip': base_ip,
-                'destination_ip': '192.168.1.10',
-                'event_type': 'failed_login',
-                'severity': 'HIGH' if i > 10 else 'MEDIUM',
-                'description': f'Failed login attempt {i+1} from {base_ip}',
-                'port': random.choice([22, 3389, 21])
-            })
+        n = 20
+        ports = rng.choices([22, 3389, 21], k=n)
+        telemetry = [{
+            'timestamp': ts,
+            'source_ip': base_ip,
+            'destination_ip': '192.168.1.10',
+            'event_type': 'failed_login',
+            'severity': 'HIGH' if i > 10 else 'MEDIUM',
+            'description': f'Failed login attempt {i+1} from {base_ip}',
+            'port': port
+        } for i, (ts, port) in enumerate(zip(timestamps(n, timedelta(seconds=2)), ports))]
     
     elif attack_type == "ddos":
         # Simulate DDoS attack
-        for i in range(50):
-            telemetry.append({
-                'timestamp': (datetime.now() - timedelta(milliseconds=i*100)).isoformat(),
-                'source_ip': f"10.{random.randint(0, 255)}.{random.randint(0, 255)}.{random.randint(1, 254)}",
-                'destination_ip': '192.168.1.1',
-                'event_type': 'anomalous_traffic',
-                'severity': severity,
-                'description': 'High volume traffic detected - possible DDoS',
-                'port': 80
-            })
+        n = 50
+        octets_b = rng.choices(range(256), k=n)
+        octets_c = rng.choices(range(256), k=n)
+        octets_d = rng.choices(range(1, 255), k=n)
+        telemetry = [{
+            'timestamp': ts,
+            'source_ip': f"10.{b}.{c}.{d}",
+            'destination_ip': '192.168.1.1',
+            'event_type': 'anomalous_traffic',
+            'severity': severity,
+            'description': 'High volume traffic detected - possible DDoS',
+            'port': 80
+        } for ts, b, c, d in zip(timestamps(n, timedelta(milliseconds=100)), octets_b, octets_c, octets_d)]
     
     elif attack_type == "data_exfiltration":
         # Simulate data exfiltration
-        for i in range(15):
-            telemetry.append({
-                'timestamp': (datetime.now() - timedelta(seconds=i*10)).isoformat(),
-                'source_ip': '192.168.1.50',
-                'destination_ip': base_ip,
-                'event_type': random.choice(['large_data_transfer', 'anomalous_traffic', 'unauthorized_access']),
-                'severity': severity,
-                'description': 'Unusual data transfer to external IP detected',
-                'port': random.choice([443, 8080, 1337])
-            })
+        n = 15
+        event_types = rng.choices(['large_data_transfer', 'anomalous_traffic', 'unauthorized_access'], k=n)
+        ports = rng.choices([443, 8080, 1337], k=n)
+        telemetry = [{
+            'timestamp': ts,
+            'source_ip': '192.168.1.50',
+            'destination_ip': base_ip,
+            'event_type': event_type,
+            'severity': severity,
+            'description': 'Unusual data transfer to external IP detected',
+            'port': port
+        } for ts, event_type, port in zip(timestamps(n, timedelta(seconds=10)), event_types, ports)]
     
     elif attack_type == "apt":
         # Simulate Advanced Persistent Threat
-        for i in range(8):
-            telemetry.append({
-                'timestamp': (datetime.now() - timedelta(minutes=i*5)).isoformat(),
-                'source_ip': base_ip,
-                'destination_ip': f"192.168.{random.randint(1, 10)}.{random.randint(1, 254)}",
-                'event_type': random.choice(['port_scan', 'lateral_movement', 'privilege_escalation']),
-                'severity': 'CRITICAL',
-                'description': 'APT activity detected - sophisticated attack pattern',
-                'port': random.randint(1024, 65535)
-            })
+        n = 8
+        subnets = rng.choices(range(1, 11), k=n)
+        hosts = rng.choices(range(1, 255), k=n)
+        event_types = rng.choices(['port_scan', 'lateral_movement', 'privilege_escalation'], k=n)
+        ports = rng.choices(range(1024, 65536), k=n)
+        telemetry = [{
+            'timestamp': ts,
+            'source_ip': base_ip,
+            'destination_ip': f"192.168.{subnet}.{host}",
+            'event_type': event_type,
+            'severity': 'CRITICAL',
+            'description': 'APT activity detected - sophisticated attack pattern',
+            'port': port
+        } for ts, subnet, host, event_type, port in zip(timestamps(n, timedelta(minutes=5)), subnets, hosts, event_types, ports)]
     
     else:
         # Generic attack telemetry
-        for i in range(10):
-            telemetry.append({
-                'timestamp': (datetime.now() - timedelta(seconds=i*3)).isoformat(),
-                'source_ip': base_ip,
-                'destination_ip': f"192.168.1.{random.randint(1, 254)}",
-                'event_type': random.choice(['suspicious_activity', 'anomalous_traffic', 'policy_violation']),
-                'severity': severity,
-                'description': f'Security event detected: {attack_type}',
-                'port': random.randint(1, 65535)
-            })
+        n = 10
+        hosts = rng.choices(range(1, 255), k=n)
+        event_types = rng.choices(['suspicious_activity', 'anomalous_traffic', 'policy_violation'], k=n)
+        ports = rng.choices(range(1, 65536), k=n)
+        telemetry = [{
+            'timestamp': ts,
+            'source_ip': base_ip,
+            'destination_ip': f"192.168.1.{host}",
+            'event_type': event_type,
+            'severity': severity,
+            'description': f'Security event detected: {attack_type}',
+            'port': port
+        } for ts, host, event_type, port in zip(timestamps(n, timedelta(seconds=3)), hosts, event_types, ports)]
     
     return telemetry
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8001)
\ No newline at end of file
+    # loop/http "auto" pick uvloop and httptools when installed (uvicorn[standard]);
+    # frames are compressed once in the manager, so skip per-client deflate
+    uvicorn.run(app, host="0.0.0.0", port=8001, loop="auto", http="auto", ws="websockets", ws_per_message_deflate=False)
\ No newline at end of file
@@ -1,6 +1,20 @@
 # backend/websocket_manager.py
+import asyncio
+import zlib
 from fastapi import WebSocket
-from typing import List
+from starlette.websockets import WebSocketState
+from typing import List, Union
+
+# Clients are sent to concurrently in batches of this size, yielding to the
+# event loop between batches so a large fan-out doesn't stall other requests.
+BROADCAST_BATCH_SIZE = 50
+
+# Binary frames carry zlib-compressed JSON. Compressing here, once per message,
+# replaces per-client permessage-deflate (disabled in the uvicorn config).
+COMPRESSION_LEVEL = 1
+
+def pack(payload: bytes) -> bytes:
+    return zlib.compress(payload, COMPRESSION_LEVEL)
 
 class ConnectionManager:
     def __init__(self):
@@ -11,11 +25,36 @@ class ConnectionManager:
         self.active_connections.append(websocket)
 
     def disconnect(self, websocket: WebSocket):
-        self.active_connections.remove(websocket)
+        # May already have been dropped by a failed broadcast
+        if websocket in self.active_connections:
+            self.active_connections.remove(websocket)
+
+    async def send(self, websocket: WebSocket, message: bytes):
+        await websocket.send_bytes(pack(message))
 
-    async def broadcast(self, message: str):
-        for connection in self.active_connections:
-            await connection.send_text(message)
+    async def broadcast(self, message: Union[str, bytes]):
+        # Snapshot the list so connects/disconnects during the awaits are safe,
+        # dropping sockets that already closed rather than sending into them
+        connections = []
+        for connection in list(self.active_connections):
+            if connection.application_state == WebSocketState.DISCONNECTED:
+                self.disconnect(connection)
+            else:
+                connections.append(connection)
+        if isinstance(message, bytes):
+            message = pack(message)
+        for start in range(0, len(connections), BROADCAST_BATCH_SIZE):
+            batch = connections[start:start + BROADCAST_BATCH_SIZE]
+            if isinstance(message, bytes):
+                sends = (connection.send_bytes(message) for connection in batch)
+            else:
+                sends = (connection.send_text(message) for connection in batch)
+            results = await asyncio.gather(*sends, return_exceptions=True)
+            # Drop clients whose socket is gone instead of failing the broadcast
+            for connection, result in zip(batch, results):
+                if isinstance(result, Exception):
+                    self.disconnect(connection)
+            await asyncio.sleep(0)
 
 # Create a single instance to be used by the app
 manager = ConnectionManager()
\ No newline at end of file
@@ -1,8 +1,13 @@
 # backend/weather/agent.py
 import os
+import re
 import json
+import asyncio
+import functools
+import httpx
 from typing import TypedDict, Dict, Any
 from dotenv import load_dotenv
+from langchain_core.prompts import ChatPromptTemplate
 from langchain_groq import ChatGroq
 from langgraph.graph import StateGraph, END
 
@@ -32,57 +37,71 @@ class AgentState(TypedDict):
     anomaly_assessment: dict
     decision_analysis: dict
     control_action: dict
+    run_judge: bool
     final_verdict: str
 
 
 # --- 2. Initialize Models (no changes here) ---
-llm = ChatGroq(model_name="llama-3.1-8b-instant", temperature=0)
-judge_llm = ChatGroq(model_name="llama-3.1-8b-instant", temperature=0.1)
+# One pooled keep-alive client shared by both models, so agent runs reuse
+# open connections to Groq instead of re-handshaking each call.
+groq_http_client = httpx.AsyncClient(
+    limits=httpx.Limits(max_connections=32, max_keepalive_connections=16)
+)
+llm = ChatGroq(model_name="llama-3.1-8b-instant", temperature=0, http_async_client=groq_http_client)
+judge_llm = ChatGroq(model_name="llama-3.1-8b-instant", temperature=0.1, http_async_client=groq_http_client)
+
+async def aclose():
+    await groq_http_client.aclose()
 
 
 # --- 3. Define the Nodes for the Enhanced Pipeline ---
 
 # NEW: Helper function to generate mock weather for simulations
-def get_mock_weather_for_scenario(scenario: str) -> dict:
-    """Creates mock weather data based on the simulation scenario."""
-    base_data = {
+def _mock_weather(text: str, temp_c: int, wind_kph: int, humidity: int) -> dict:
+    return {
         "current": {
-            "condition": {"text": "Clear"}, "temp_c": 29, "wind_kph": 10, "humidity": 60, "air_quality": {"us-epa-index": 1}
+            "condition": {"text": text}, "temp_c": temp_c, "wind_kph": wind_kph, "humidity": humidity, "air_quality": {"us-epa-index": 1}
         }
     }
-    if "rain" in scenario:
-        base_data["current"]["condition"]["text"] = "Heavy Rain"
-        base_data["current"]["temp_c"] = 24
-        base_data["current"]["wind_kph"] = 25
-        base_data["current"]["humidity"] = 90
-    elif "fog" in scenario:
-        base_data["current"]["condition"]["text"] = "Dense Fog"
-        base_data["current"]["temp_c"] = 22
-        base_data["current"]["wind_kph"] = 5
-        base_data["current"]["humidity"] = 95
-    elif "cyclone" in scenario:
-        base_data["current"]["condition"]["text"] = "Cyclone Alert"
-        base_data["current"]["temp_c"] = 26
-        base_data["current"]["wind_kph"] = 60
-        base_data["current"]["humidity"] = 88
-    elif "clear" in scenario:
-        base_data["current"]["condition"]["text"] = "Clear Sky"
-    
-    return base_data
+
+# Built once at import. Downstream nodes only read weather_data, so every run
+# shares these snapshots instead of building a fresh dict per simulation.
+_MOCK_WEATHER = {
+    "rain": _mock_weather("Heavy Rain", 24, 25, 90),
+    "fog": _mock_weather("Dense Fog", 22, 5, 95),
+    "cyclone": _mock_weather("Cyclone Alert", 26, 60, 88),
+    "clear": _mock_weather("Clear Sky", 29, 10, 60),
+    "default": _mock_weather("Clear", 29, 10, 60),
+}
+
+@functools.lru_cache(maxsize=256)
+def _classify_scenario(scenario: str) -> str:
+    for key in ("rain", "fog", "cyclone", "clear"):
+        if key in scenario:
+            return key
+    return "default"
+
+def get_mock_weather_for_scenario(scenario: str) -> dict:
+    """Returns the shared mock weather snapshot for the simulation scenario."""
+    return _MOCK_WEATHER[_classify_scenario(scenario)]
 
 # UPDATED: The data collection node now uses the mock weather
-def data_collection_node(state: AgentState) -> Dict[str, Any]:
+# Async so the independent collector calls run concurrently (the weather
+# fetch is natively async; tool.ainvoke runs sync tool bodies in a thread).
+async def data_collection_node(state: AgentState) -> Dict[str, Any]:
     print("---NODE: Data Collection---")
     scenario = state.get("scenario")
+    cctv_call = collector_tools.get_enhanced_synthetic_cctv_data.ainvoke({"time_of_day": "day"})
     
     if scenario:
         print(f"--- Using Mock Weather for Scenario: {scenario} ---")
         state["weather_data"] = get_mock_weather_for_scenario(scenario)
+        state["cctv_data"] = await cctv_call
     else:
-        state["weather_data"] = collector_tools.fetch_weather_data.invoke({"location": state.get('location', 'Mumbai')})
-
-    # Call CCTV data correctly
-    state["cctv_data"] = collector_tools.get_enhanced_synthetic_cctv_data.invoke({"time_of_day": "day"})
+        state["weather_data"], state["cctv_data"] = await asyncio.gather(
+            collector_tools.fetch_weather_data.ainvoke({"location": state.get('location', 'Mumbai')}),
+            cctv_call,
+        )
     
     # Mock IoT Data
     state["iot_data"] = {
@@ -128,24 +147,33 @@ def decision_engine_node(state: AgentState) -> Dict[str, Any]:
     decision_engine_tools.perform_comprehensive_decision_analysis(state)
     return {"decision_analysis": state.get("decision_analysis", {})}
 
+# The whole word just before the first "%" must be an integer, e.g.
+# "Set brightness to 60%" or "60% brightness" -> "60"; "85.5%" is skipped.
+_BRIGHTNESS_RE = re.compile(r"[^%]*?(?<!\S)([+-]?\d+)\s*%")
+
 def control_executor_node(state: AgentState) -> Dict[str, Any]:
     print("---NODE: Control Executor---")
     decision_analysis = state.get("decision_analysis", {})
     recommendations = decision_analysis.get("operational_recommendations", [])
     brightness = 85
     for rec in recommendations:
-        if "brightness" in rec.lower():
-            try:
-                percent_index = rec.find('%')
-                if percent_index != -1:
-                    num_str = rec[:percent_index].split()[-1]
-                    brightness = int(num_str)
-                    break
-            except (ValueError, IndexError):
-                continue
+        if "brightness" not in rec.lower():
+            continue
+        match = _BRIGHTNESS_RE.match(rec)
+        if match:
+            brightness = int(match.group(1))
+            break
     return {"control_action": {"brightness": brightness}}
 
-def system_monitor_node(state: AgentState) -> Dict[str, str]:
+JUDGE_PROMPT = ChatPromptTemplate.from_template(
+    "You are an expert safety evaluator.\n"
+    "Current Situation: \"{summary}\"\n"
+    "Agent's Recommended Action: \"{decision}\"\n"
+    "Is this a reasonable, safe, and effective action?\n"
+    "Respond with only 'APPROVE' or 'REJECT', followed by a brief justification."
+)
+
+async def system_monitor_node(state: AgentState) -> Dict[str, str]:
     print("---NODE: System Monitor (LLM Judge)---")
     summary = state.get("anomaly_assessment", {}).get("summary", "No summary.")
     decision_analysis = state.get("decision_analysis", {})
@@ -154,17 +182,16 @@ def system_monitor_node(state: AgentState) -> Dict[str, str]:
         decision = recommendations[0]
     else:
         decision = "No specific action recommended; maintaining normal operations."
-    prompt = f"""
-    You are an expert safety evaluator.
-    Current Situation: "{summary}"
-    Agent's Recommended Action: "{decision}"
-    Is this a reasonable, safe, and effective action?
-    Respond with only 'APPROVE' or 'REJECT', followed by a brief justification.
-    """
-    verdict = judge_llm.invoke(prompt).content
+    prompt = JUDGE_PROMPT.format_messages(summary=summary, decision=decision)
+    verdict = (await judge_llm.ainvoke(prompt)).content
     print(f"---JUDGE'S VERDICT: {verdict}")
     return {"final_verdict": verdict}
 
+def route_after_control(state: AgentState) -> str:
+    # The judge only produces an informational verdict, so callers can skip
+    # that extra LLM round-trip by passing run_judge=False.
+    return "system_monitor" if state.get("run_judge", True) else END
+
 
 # --- 4. Assemble and Compile the Graph (no changes here) ---
 workflow = StateGraph(AgentState)
@@ -183,7 +210,7 @@ workflow.add_edge("data_processing", "sensor_fusion")
 workflow.add_edge("sensor_fusion", "anomaly_detection")
 workflow.add_edge("anomaly_detection", "decision_engine")
 workflow.add_edge("decision_engine", "control_executor")
-workflow.add_edge("control_executor", "system_monitor")
+workflow.add_conditional_edges("control_executor", route_after_control)
 workflow.add_edge("system_monitor", END)
 
 agent_app = workflow.compile()
\ No newline at end of file
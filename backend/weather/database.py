@@ -1,5 +1,6 @@
 # backend/weather/database.py
 from sqlmodel import SQLModel, create_engine, Session, select
+from sqlalchemy import event
 from sqlalchemy.orm import sessionmaker
 from models import Zone, LightPole
 
@@ -8,7 +9,35 @@ import os
 sqlite_file_name = os.path.join(os.path.dirname(__file__), "smartcity.db")
 sqlite_url = f"sqlite:///{sqlite_file_name}"
 
-engine = create_engine(sqlite_url, echo=False)
+# DATABASE_URL (e.g. postgresql+psycopg://...) swaps SQLite for a server DB
+# when writes need to scale past a single SQLite writer
+database_url = os.getenv("DATABASE_URL", sqlite_url)
+is_sqlite = database_url.startswith("sqlite")
+
+engine = create_engine(
+    database_url,
+    echo=False,
+    connect_args={"check_same_thread": False, "timeout": 30} if is_sqlite else {},
+    pool_size=20,
+    max_overflow=40,
+    pool_timeout=2.0,      # fail fast instead of queueing behind a stuck request
+    pool_recycle=3600,
+    pool_pre_ping=True,
+)
+
+# WAL lets dashboard reads proceed while the agent writes; the rest trades a
+# little durability on power loss for fewer fsyncs and faster temp tables.
+def _set_sqlite_pragmas(dbapi_conn, _):
+    cursor = dbapi_conn.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.execute("PRAGMA mmap_size=268435456")
+    cursor.close()
+
+if is_sqlite:
+    event.listen(engine, "connect", _set_sqlite_pragmas)
+
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine, class_=Session)
 
 def get_session():
@@ -28,24 +57,24 @@ def seed_data_if_empty():
 
         print("🌱 Seeding database with initial data...")
         
-        # 1. CSM Airport
-        airport = Zone(id="airport_zone", name="CSM International Airport", color="#f97316", heat_threshold=38, congestion_threshold=0.8)
-        session.add(airport)
-        session.add(LightPole(id="AIR-01", zone_id="airport_zone", latitude=19.0896, longitude=72.8656, brightness=80, group="CSM International Airport"))
-        session.add(LightPole(id="AIR-02", zone_id="airport_zone", latitude=19.0912, longitude=72.8648, brightness=80, group="CSM International Airport"))
-        session.add(LightPole(id="AIR-03", zone_id="airport_zone", latitude=19.0881, longitude=72.8665, brightness=0, status="OFFLINE", group="CSM International Airport"))
-        
-        # 2. KEM Hospital
-        hospital = Zone(id="hospital_zone", name="KEM Hospital", color="#ef4444", heat_threshold=40, congestion_threshold=0.7)
-        session.add(hospital)
-        session.add(LightPole(id="HOS-01", zone_id="hospital_zone", latitude=19.0150, longitude=72.8400, brightness=90, priority="High", group="KEM Hospital"))
-        session.add(LightPole(id="HOS-04", zone_id="hospital_zone", latitude=19.0158, longitude=72.8415, brightness=0, status="MAINTENANCE", priority="High", group="KEM Hospital"))
-
-        # 3. Dadar Residential
-        dadar = Zone(id="residential_zone", name="Dadar Residential Area", color="#3b82f6", heat_threshold=36, congestion_threshold=0.85)
-        session.add(dadar)
-        session.add(LightPole(id="RES-01", zone_id="residential_zone", latitude=19.0220, longitude=72.8440, brightness=60, priority="Low", group="Dadar Residential Area"))
-        session.add(LightPole(id="RES-02", zone_id="residential_zone", latitude=19.0235, longitude=72.8430, brightness=65, priority="Low", group="Dadar Residential Area"))
+        zones = [
+            Zone(id="airport_zone", name="CSM International Airport", color="#f97316", heat_threshold=38, congestion_threshold=0.8),  # 1. CSM Airport
+            Zone(id="hospital_zone", name="KEM Hospital", color="#ef4444", heat_threshold=40, congestion_threshold=0.7),  # 2. KEM Hospital
+            Zone(id="residential_zone", name="Dadar Residential Area", color="#3b82f6", heat_threshold=36, congestion_threshold=0.85),  # 3. Dadar Residential
+        ]
+        poles = [
+            LightPole(id="AIR-01", zone_id="airport_zone", latitude=19.0896, longitude=72.8656, brightness=80, group="CSM International Airport"),
+            LightPole(id="AIR-02", zone_id="airport_zone", latitude=19.0912, longitude=72.8648, brightness=80, group="CSM International Airport"),
+            LightPole(id="AIR-03", zone_id="airport_zone", latitude=19.0881, longitude=72.8665, brightness=0, status="OFFLINE", group="CSM International Airport"),
+            LightPole(id="HOS-01", zone_id="hospital_zone", latitude=19.0150, longitude=72.8400, brightness=90, priority="High", group="KEM Hospital"),
+            LightPole(id="HOS-04", zone_id="hospital_zone", latitude=19.0158, longitude=72.8415, brightness=0, status="MAINTENANCE", priority="High", group="KEM Hospital"),
+            LightPole(id="RES-01", zone_id="residential_zone", latitude=19.0220, longitude=72.8440, brightness=60, priority="Low", group="Dadar Residential Area"),
+            LightPole(id="RES-02", zone_id="residential_zone", latitude=19.0235, longitude=72.8430, brightness=65, priority="Low", group="Dadar Residential Area"),
+        ]
 
+        # Flushing per table lets SQLAlchemy emit each as one executemany INSERT
+        session.add_all(zones)
+        session.flush()
+        session.add_all(poles)
         session.commit()
         print("✅ Database seeded successfully!")
\ No newline at end of file
@@ -3,16 +3,27 @@ import sys, os
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
 import patch_wmi
 
-import json
+import asyncio
+import functools
+import logging
+import queue
 import random
-from datetime import datetime
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect, Depends, HTTPException
+import time
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+import orjson
+from fastapi import FastAPI, WebSocket, WebSocketDisconnect, Depends, HTTPException, Response
 from fastapi.middleware.cors import CORSMiddleware
+from sqlalchemy import update
+from sqlalchemy.orm import selectinload
 from sqlmodel import Session, select, SQLModel  # Added SQLModel to imports
 
 # Local imports
 from websocket_manager import manager
+import agent
 from agent import agent_app
+from tools import collector_tools, embedding_client
 from models import Zone, LightPole, SimulationRequest, OverrideRequest, ZoneCreate, WeatherAnomaly
 from database import create_db_and_tables, get_session, seed_data_if_empty
 
@@ -27,18 +38,179 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# --- Startup Event ---
+# --- Event Log ---
+# Endpoints only enqueue events; a background listener thread owns the file
+# handle and does the disk writes, so no request blocks on the log. Kept out
+# of the root logger so events only land in the file.
+_event_log = logging.getLogger("events")
+_event_log.setLevel(logging.INFO)
+_event_log.propagate = False
+
+_event_handler = logging.FileHandler("events.log", delay=True)
+_event_handler.setFormatter(logging.Formatter("%(asctime)s | %(message)s", datefmt="%I:%M:%S %p"))
+_event_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+_event_listener = QueueListener(_event_queue, _event_handler)
+_event_log.addHandler(QueueHandler(_event_queue))
+
+# --- Startup / Shutdown Events ---
 @app.on_event("startup")
 def on_startup():
+    _event_listener.start()
     create_db_and_tables()
     seed_data_if_empty()
 
+@app.on_event("shutdown")
+async def on_shutdown():
+    await agent.aclose()
+    await collector_tools.aclose()
+    embedding_client.close_session()
+    await embedding_client.aclose()
+    # Drains whatever is still queued before the process exits
+    _event_listener.stop()
+
 # --- Helpers ---
 def log_event(message: str):
-    """Appends an event to the events.log file."""
-    timestamp = datetime.now().strftime("%I:%M:%S %p")
-    with open("events.log", "a") as f:
-        f.write(f"{timestamp} | {message}\n")
+    """Appends an event to the events.log file, stamped with when it happened."""
+    _event_log.info(message)
+
+def _encode(payload) -> bytes:
+    """Serializes an API/WebSocket payload to JSON bytes with orjson."""
+    # agentResult may hold values orjson can't encode natively; fall back to str()
+    return orjson.dumps(
+        payload,
+        default=str,
+        option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NAIVE_UTC,
+    )
+
+def _json_response(payload) -> Response:
+    """JSON response encoded by orjson, skipping FastAPI's jsonable_encoder pass."""
+    return Response(content=_encode(payload), media_type="application/json")
+
+def _fetch_zones_with_poles(session: Session):
+    """Loads every zone with its poles in two queries instead of one per zone."""
+    # sql_only raiseload flags any other lazy SELECT while still allowing
+    # pole.zone to resolve from the identity map
+    return session.exec(
+        select(Zone).options(selectinload(Zone.poles).raiseload("*", sql_only=True))
+    ).all()
+
+# Plain dicts straight from the ORM attributes; skips a Pydantic model_dump()
+# schema walk per row on every payload rebuild.
+def _pole_to_dict(p: LightPole) -> dict:
+    return {
+        "id": p.id,
+        "zone_id": p.zone_id,
+        "latitude": p.latitude,
+        "longitude": p.longitude,
+        "altitude": p.altitude,
+        "brightness": p.brightness,
+        "status": p.status,
+        "priority": p.priority,
+        "manual_override": p.manual_override,
+        "group": p.group,
+        "location": (p.latitude, p.longitude),
+    }
+
+def _zone_to_dict(z: Zone) -> dict:
+    return {
+        "id": z.id,
+        "name": z.name,
+        "color": z.color,
+        "heat_threshold": z.heat_threshold,
+        "congestion_threshold": z.congestion_threshold,
+        "height": z.height,
+    }
+
+_AGENT_CONTROLLED = (LightPole.status == "ONLINE", LightPole.manual_override == False)
+
+def _brightness_already_applied(session: Session, brightness: int) -> bool:
+    """True when every agent-controlled pole already has `brightness`."""
+    stmt = select(LightPole.id).where(*_AGENT_CONTROLLED, LightPole.brightness != brightness).limit(1)
+    return session.exec(stmt).first() is None
+
+def _set_agent_brightness(session: Session, brightness: int) -> List[str]:
+    """Sets brightness on every online, non-overridden pole; returns their ids."""
+    if session.get_bind().dialect.update_returning:
+        # One UPDATE ... RETURNING round-trip
+        stmt = update(LightPole).where(*_AGENT_CONTROLLED).values(brightness=brightness).returning(LightPole.id)
+        return list(session.exec(stmt).scalars().all())
+    # No RETURNING (e.g. SQLite < 3.35): fetch just the ids, then write plain
+    # mappings without loading ORM objects or unit-of-work change tracking
+    ids = list(session.exec(select(LightPole.id).where(*_AGENT_CONTROLLED)).all())
+    session.bulk_update_mappings(LightPole, [{"id": pole_id, "brightness": brightness} for pole_id in ids])
+    return ids
+
+# --- State Payload Cache ---
+# The single builder for the encoded {"zones": [...]} snapshot, shared by
+# /initial-state and the WebSocket handshake (writes broadcast deltas
+# instead). Dropped by every endpoint that changes zones or poles, so the DB
+# is only re-read after a write.
+_state_bytes: Optional[bytes] = None
+
+# Base temperature for Mumbai today, and the RNG for the virtual pole temperatures
+BASE_TEMP = 32.0
+_rng = np.random.default_rng()
+
+def invalidate_state_cache():
+    """Forces the next state payload to be rebuilt from the DB."""
+    global _state_bytes
+    _state_bytes = None
+
+def _build_state_payload(session: Session) -> bytes:
+    """Returns the encoded zones snapshot, rebuilding it if stale."""
+    global _state_bytes
+    if _state_bytes is None:
+        zones = _fetch_zones_with_poles(session)
+
+        # SPATIAL LOGIC: Calculate specific temp for each pole's location,
+        # drawing every pole's offset in one vectorized RNG call
+        ranges = []
+        for z in zones:
+            ranges.extend([heat_island_offset_range(z.name)] * len(z.poles))
+        lows = np.fromiter((low for low, _ in ranges), float, len(ranges))
+        highs = np.fromiter((high for _, high in ranges), float, len(ranges))
+        temps = iter((BASE_TEMP + _rng.uniform(lows, highs)).tolist())
+
+        response_zones = []
+        for z in zones:
+            z_dict = _zone_to_dict(z)
+            # Inject Virtual Sensor Data
+            z_dict['poles'] = []
+            for p in z.poles:
+                pole_data = _pole_to_dict(p)
+                pole_data["temperature"] = next(temps)
+                z_dict['poles'].append(pole_data)
+            response_zones.append(z_dict)
+
+        _state_bytes = _encode({"zones": response_zones})
+    return _state_bytes
+
+# --- Agent Result Cache ---
+# Repeating a simulation with the same inputs reuses the previous agent run
+# for a short window instead of re-running the whole LLM pipeline.
+AGENT_CACHE_TTL = 60.0  # seconds
+AGENT_CACHE_MAXSIZE = 128
+_agent_cache: Dict[bytes, Tuple[float, dict]] = {}
+
+# Caps how many agent runs hit the Groq API at once.
+MAX_CONCURRENT_AGENTS = 4
+_agent_slots = asyncio.Semaphore(MAX_CONCURRENT_AGENTS)
+
+async def run_agent_cached(inputs: dict) -> dict:
+    """Runs the agent graph, serving repeats of the same inputs from the cache."""
+    key = orjson.dumps(inputs, option=orjson.OPT_SORT_KEYS)
+    now = time.monotonic()
+    cached = _agent_cache.pop(key, None)
+    if cached is None or cached[0] <= now:
+        async with _agent_slots:
+            # ainvoke keeps the graph off the event loop: async nodes are
+            # awaited and the sync tool nodes run in the default thread pool
+            result = await agent_app.ainvoke(inputs)
+        cached = (now + AGENT_CACHE_TTL, result)
+        if len(_agent_cache) >= AGENT_CACHE_MAXSIZE:
+            _agent_cache.pop(next(iter(_agent_cache)))  # evict least recently used
+    _agent_cache[key] = cached
+    return cached[1]
 
 # --- API Endpoints ---
 
@@ -48,33 +220,14 @@ def read_root():
 
 @app.get("/api/v1/dashboard/initial-state")
 async def get_initial_state(session: Session = Depends(get_session)):
-    zones = session.exec(select(Zone)).all()
-    
-    # Base temperature for Mumbai today
-    base_temp = 32.0 
-
-    response_zones = []
-    for z in zones:
-        z_dict = z.model_dump()
-        # Inject Virtual Sensor Data
-        z_dict['poles'] = []
-        for p in z.poles:
-            pole_data = p.model_dump()
-            pole_data["location"] = p.location
-            # SPATIAL LOGIC: Calculate specific temp for this pole's location
-            pole_data["temperature"] = calculate_heat_island_temp(base_temp, z.name)
-            z_dict['poles'].append(pole_data)
-            
-        response_zones.append(z_dict)
-        
-    return {"zones": response_zones}
+    return Response(content=_build_state_payload(session), media_type="application/json")
 
 @app.get("/api/v1/zones/{zone_id}/config")
 async def get_zone_config(zone_id: str, session: Session = Depends(get_session)):
     zone = session.get(Zone, zone_id)
     if not zone:
         raise HTTPException(status_code=404, detail="Zone not found")
-    return {"heat_threshold": zone.heat_threshold, "congestion_threshold": zone.congestion_threshold}
+    return _json_response({"heat_threshold": zone.heat_threshold, "congestion_threshold": zone.congestion_threshold})
 
 @app.post("/api/v1/zones/{zone_id}/config")
 async def set_zone_config(zone_id: str, config: dict, session: Session = Depends(get_session)):
@@ -90,8 +243,9 @@ async def set_zone_config(zone_id: str, config: dict, session: Session = Depends
     session.add(zone)
     session.commit()
     session.refresh(zone)
+    invalidate_state_cache()
     log_event(f"Config Update | Zone: {zone.name} updated config.")
-    return {"success": True, "new_config": config}
+    return _json_response({"success": True, "new_config": config})
 
 # --- NEW: Infrastructure Management (Add Light Pole) ---
 
@@ -130,27 +284,31 @@ async def create_light_pole(pole_data: PoleCreate, session: Session = Depends(ge
     
     session.add(new_pole)
     session.commit()
+    invalidate_state_cache()
     
     log_event(f"Infrastructure Added | New Pole {new_pole.id} added to {zone.name}")
     
-    # 4. Broadcast update so Map updates immediately
-    zones = session.exec(select(Zone)).all()
-    payload_zones = []
-    for z in zones:
-        z_dict = z.model_dump()
-        z_dict['poles'] = [{**p.model_dump(), "location": p.location} for p in z.poles]
-        payload_zones.append(z_dict)
-
-    await manager.broadcast(json.dumps({"zones": payload_zones}))
+    # 4. Broadcast just the new pole so Map updates immediately
+    pole_dict = _pole_to_dict(new_pole)
+    await manager.broadcast(_encode({
+        "type": "pole_added",
+        "zone_id": new_pole.zone_id,
+        "pole": {**pole_dict, "temperature": calculate_heat_island_temp(BASE_TEMP, zone.name)},
+    }))
     
-    return {"success": True, "pole": new_pole}
+    return _json_response({"success": True, "pole": pole_dict})
 
 # --- Simulation & Control Endpoints ---
 
+# Agent report in the last simulation broadcast, so a repeat of an
+# already-applied decision with the same report sends nothing
+_last_simulation_result: Optional[dict] = None
+
 @app.post("/api/v1/simulation/weather")
 async def simulate_weather(request: SimulationRequest, session: Session = Depends(get_session)):
+    global _last_simulation_result
     # 1. Fetch State from DB
-    zones = session.exec(select(Zone)).all()
+    zones = _fetch_zones_with_poles(session)
     target_zone = zones[0] # Default to first zone for simulation context
     
     log_event(f"Simulation Triggered | Scenario: {request.scenario}")
@@ -181,72 +339,85 @@ async def simulate_weather(request: SimulationRequest, session: Session = Depend
             )
             session.add(new_anomaly)
             log_event(f"Weather Anomaly Created | Zone: {target_zone.name}")
-            
-    session.commit()
-    # -----------------------------------------------------
 
-    # 2. Run Agent
+    # Read the agent inputs before committing: touching expired attributes
+    # afterwards would reopen a transaction and pin a pooled connection for
+    # the whole agent run.
     inputs = {
         "scenario": request.scenario,
         "location": "Mumbai",
         "zone_id": target_zone.id,
         "config": {"heat_threshold": target_zone.heat_threshold},
+        "run_judge": request.run_judge,
     }
-    result = agent_app.invoke(inputs)
+    session.commit()
+    # -----------------------------------------------------
+
+    # 2. Run Agent
+    result = await run_agent_cached(inputs)
+    if result.get('final_verdict'):
+        # The verdict is free-form LLM text; keep it to one log line
+        log_event(f"LLM Judge Verdict | {' '.join(str(result['final_verdict']).split())}")
 
     # 3. Apply Agent Decisions to DB
     control_action = result.get('control_action', {})
     new_brightness = control_action.get('brightness')
-    
+
+    # A repeat of the current state (common while the scenario stays the
+    # same) skips the UPDATE and commit, and is only broadcast if the agent's
+    # report differs from the last one sent
+    if new_brightness is not None and _brightness_already_applied(session, new_brightness):
+        log_event(f"Agent Decision | Poles already at {new_brightness}% brightness.")
+        if result != _last_simulation_result:
+            _last_simulation_result = result
+            await manager.broadcast(_encode({"type": "agent_result", "agentResult": result}))
+        return _json_response({"message": "Simulation successful", "judge_verdict": result.get('final_verdict')})
+
     if new_brightness is not None:
         # Update ALL online poles in DB
-        poles = session.exec(select(LightPole).where(LightPole.status == "ONLINE", LightPole.manual_override == False)).all()
-        for pole in poles:
-            pole.brightness = new_brightness
-            session.add(pole)
+        updated_pole_ids = _set_agent_brightness(session, new_brightness)
         session.commit()
-        log_event(f"Agent Decision | Set {len(poles)} poles to {new_brightness}% brightness.")
+        invalidate_state_cache()
+        log_event(f"Agent Decision | Set {len(updated_pole_ids)} poles to {new_brightness}% brightness.")
 
     # 4. Broadcast Update
-    # Re-fetch fresh state
-    fresh_zones = session.exec(select(Zone)).all()
-    payload_zones = []
-    for z in fresh_zones:
-        z_dict = z.model_dump()
-        z_dict['poles'] = [{**p.model_dump(), "location": p.location} for p in z.poles]
-        payload_zones.append(z_dict)
-
-    payload = {
-        "zones": payload_zones,
-        "agentResult": result,
-    }
-    await manager.broadcast(json.dumps(payload, default=str))
+    # Only the poles the agent changed, plus the agent's report
+    if new_brightness is not None:
+        message = {
+            "type": "brightness_update",
+            "pole_ids": updated_pole_ids,
+            "brightness": new_brightness,
+            "agentResult": result,
+        }
+    else:
+        message = {"type": "agent_result", "agentResult": result}
+    _last_simulation_result = result
+    await manager.broadcast(_encode(message))
     
-    return {"message": "Simulation successful", "judge_verdict": result.get('final_verdict')}
+    return _json_response({"message": "Simulation successful", "judge_verdict": result.get('final_verdict')})
 
 @app.post("/api/v1/poles/{pole_id}/override")
 async def set_manual_override(pole_id: str, request: OverrideRequest, session: Session = Depends(get_session)):
     pole = session.get(LightPole, pole_id)
     if not pole:
-        return {"success": False, "message": "Pole not found"}
+        return _json_response({"success": False, "message": "Pole not found"})
     
     pole.manual_override = request.manual_override
     pole.brightness = request.brightness
     session.add(pole)
     session.commit()
+    invalidate_state_cache()
     
     log_event(f"Manual Override | Pole: {pole_id} set to {request.brightness}%")
     
-    # Broadcast update
-    zones = session.exec(select(Zone)).all()
-    payload_zones = []
-    for z in zones:
-        z_dict = z.model_dump()
-        z_dict['poles'] = [{**p.model_dump(), "location": p.location} for p in z.poles]
-        payload_zones.append(z_dict)
-
-    await manager.broadcast(json.dumps({"zones": payload_zones}))
-    return {"success": True, "pole_id": pole_id}
+    # Broadcast just the changed pole; clients patch their local state
+    await manager.broadcast(_encode({
+        "type": "pole_update",
+        "pole_id": pole_id,
+        "brightness": request.brightness,
+        "manual_override": request.manual_override
+    }))
+    return _json_response({"success": True, "pole_id": pole_id})
 
 # backend/weather/main.py
 
@@ -260,41 +431,21 @@ async def delete_light_pole(pole_id: str, session: Session = Depends(get_session
     
     session.delete(pole)
     session.commit()
+    invalidate_state_cache()
     
     log_event(f"Infrastructure Removed | Pole {pole_id} deleted from {zone_name}")
     
-    # Broadcast update so Map removes the marker immediately
-    zones = session.exec(select(Zone)).all()
-    payload_zones = []
-    for z in zones:
-        z_dict = z.model_dump()
-        z_dict['poles'] = [{**p.model_dump(), "location": p.location} for p in z.poles]
-        payload_zones.append(z_dict)
-
-    await manager.broadcast(json.dumps({"zones": payload_zones}))
+    # Broadcast the removal so Map drops the marker immediately
+    await manager.broadcast(_encode({"type": "pole_removed", "pole_id": pole_id}))
     
-    return {"success": True, "message": f"Pole {pole_id} deleted"}
+    return _json_response({"success": True, "message": f"Pole {pole_id} deleted"})
 
 @app.websocket("/ws/updates")
 async def websocket_endpoint(websocket: WebSocket, session: Session = Depends(get_session)):
     await manager.connect(websocket)
     
     # Send initial state with Temp
-    zones = session.exec(select(Zone)).all()
-    base_temp = 32.0 
-
-    payload_zones = []
-    for z in zones:
-        z_dict = z.model_dump()
-        z_dict['poles'] = []
-        for p in z.poles:
-            pole_data = p.model_dump()
-            pole_data["location"] = p.location
-            pole_data["temperature"] = calculate_heat_island_temp(base_temp, z.name)
-            z_dict['poles'].append(pole_data)
-        payload_zones.append(z_dict)
-
-    await websocket.send_text(json.dumps({"zones": payload_zones}))
+    await manager.send(websocket, _build_state_payload(session))
     
     try:
         while True:
@@ -302,13 +453,32 @@ async def websocket_endpoint(websocket: WebSocket, session: Session = Depends(ge
     except WebSocketDisconnect:
         manager.disconnect(websocket)
 
-def calculate_heat_island_temp(base_temp: float, zone_name: str) -> float:
-    # Airport and Commercial zones trap more heat (Concrete effect)
+# Temperature offset range (low, high) per heat category
+_HEAT_OFFSETS: Dict[str, Tuple[float, float]] = {
+    "hot": (2.0, 4.0),         # Airport and Commercial zones trap more heat (Concrete effect)
+    "regulated": (0.0, 1.0),   # Hospitals/Critical often have regulated environments or green cover
+    "cool": (-1.5, -0.5),      # Residential areas are generally cooler
+}
+
+@functools.lru_cache(maxsize=None)
+def heat_category(zone_name: str) -> str:
+    # Zone names are few and stable, so each is only scanned once
     if "Airport" in zone_name or "Commercial" in zone_name:
-        return base_temp + random.uniform(2.0, 4.0)
-    # Hospitals/Critical often have regulated environments or green cover
+        return "hot"
     elif "Hospital" in zone_name:
-        return base_temp + random.uniform(0.0, 1.0)
-    # Residential areas are generally cooler
+        return "regulated"
     else:
-        return base_temp - random.uniform(0.5, 1.5)
\ No newline at end of file
+        return "cool"
+
+def heat_island_offset_range(zone_name: str) -> Tuple[float, float]:
+    return _HEAT_OFFSETS[heat_category(zone_name)]
+
+def calculate_heat_island_temp(base_temp: float, zone_name: str) -> float:
+    low, high = heat_island_offset_range(zone_name)
+    return base_temp + random.uniform(low, high)
+
+if __name__ == "__main__":
+    import uvicorn
+    # Broadcast frames are already zlib-compressed once in the manager, so
+    # per-client permessage-deflate would only re-compress them per socket
+    uvicorn.run(app, host="0.0.0.0", port=8000, loop="auto", http="auto", ws="websockets", ws_per_message_deflate=False)
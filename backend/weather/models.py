@@ -12,7 +12,7 @@ class Zone(SQLModel, table=True):
     congestion_threshold: float = Field(default=0.8) # Moved config into the DB
     height: float = Field(default=50.0)
     # Relationship
-    poles: List["LightPole"] = Relationship(back_populates="zone")
+    poles: List["LightPole"] = Relationship(back_populates="zone", sa_relationship_kwargs={"lazy": "selectin"})
 
 class LightPole(SQLModel, table=True):
     id: str = Field(primary_key=True)
@@ -31,7 +31,9 @@ class LightPole(SQLModel, table=True):
     
     zone: Optional[Zone] = Relationship(back_populates="poles")
 
-    # Compatibility Helper: The frontend expects 'location' as a tuple
+    # Compatibility Helper: The frontend expects 'location' as a tuple.
+    # Payload builders (main._pole_to_dict) read latitude/longitude directly;
+    # this stays for other callers.
     @property
     def location(self) -> Tuple[float, float]:
         return (self.latitude, self.longitude)
@@ -50,6 +52,7 @@ class WeatherAnomaly(SQLModel, table=True):
 
 class SimulationRequest(SQLModel):
     scenario: str
+    run_judge: bool = True
 
 class OverrideRequest(SQLModel):
     manual_override: bool
@@ -1,5 +1,6 @@
 import traceback
 import sys
+import asyncio
 
 try:
     from agent import agent_app
@@ -10,7 +11,7 @@ try:
         "zone_id": "test_123",
         "config": {"heat_threshold": 35},
     }
-    result = agent_app.invoke(inputs)
+    result = asyncio.run(agent_app.ainvoke(inputs))
     print("Success! Result keys:", result.keys() if isinstance(result, dict) else result)
 except Exception as e:
     with open("python_error.txt", "w", encoding="utf-8") as f:
@@ -1,24 +1,78 @@
 # backend/weather/tools/collector_tools.py
 import os
-import requests
+import time
+import asyncio
+import httpx
+import numpy as np
 from langchain.tools import tool
 
+WEATHER_API_BASE_URL = "http://api.weatherapi.com/v1/current.json"
+API_TIMEOUT = 10.0
+
+# One pooled keep-alive client for every weather lookup, so repeated
+# simulations reuse the open connection instead of re-handshaking each call.
+# Closed from the app's shutdown hook via aclose().
+_client = httpx.AsyncClient(
+    timeout=API_TIMEOUT,
+    limits=httpx.Limits(max_connections=20, max_keepalive_connections=20),
+)
+
+async def aclose():
+    await _client.aclose()
+
+# Conditions only change on the order of minutes, so successful lookups are
+# reused for a short while rather than hitting the API on every simulation.
+WEATHER_CACHE_TTL = 90.0  # seconds
+WEATHER_CACHE_MAXSIZE = 64
+_weather_cache: dict = {}   # location -> (expires_at, weather)
+# location -> [asyncio.Lock, callers using it]; collapses concurrent misses.
+# Only locations with a fetch in flight have an entry.
+_weather_locks: dict = {}
+
 # --- Real Weather Data ---
 @tool
-def fetch_weather_data(location: str):
+async def fetch_weather_data(location: str):
     """
     Fetches real-time weather data.
     'location' can be a city name (e.g. 'Mumbai') or coordinates (e.g. '19.089,72.865').
     """
+    cached = _weather_cache.get(location)
+    if cached and cached[0] > time.monotonic():
+        return cached[1]
+
+    entry = _weather_locks.get(location)
+    if entry is None:
+        entry = _weather_locks[location] = [asyncio.Lock(), 0]
+    entry[1] += 1
+    try:
+        async with entry[0]:
+            # Another caller may have filled the cache while we waited
+            cached = _weather_cache.get(location)
+            if cached and cached[0] > time.monotonic():
+                return cached[1]
+
+            weather = await _fetch_weather(location)
+            if "error" not in weather:
+                _weather_cache.pop(location, None)  # an expired entry re-enters at the back
+                if len(_weather_cache) >= WEATHER_CACHE_MAXSIZE:
+                    _weather_cache.pop(next(iter(_weather_cache)))  # evict oldest entry
+                _weather_cache[location] = (time.monotonic() + WEATHER_CACHE_TTL, weather)
+            return weather
+    finally:
+        entry[1] -= 1
+        if not entry[1]:
+            del _weather_locks[location]  # last caller out drops the lock
+
+async def _fetch_weather(location: str) -> dict:
     api_key = os.getenv("WEATHER_API_KEY")
     if not api_key:
         return {"error": "Weather API key not found."}
 
     # WeatherAPI accepts "lat,lon" directly in the 'q' parameter
-    url = f"http://api.weatherapi.com/v1/current.json?key={api_key}&q={location}&aqi=no"
+    params = {"key": api_key, "q": location, "aqi": "no"}
     
     try:
-        response = requests.get(url)
+        response = await _client.get(WEATHER_API_BASE_URL, params=params)
         data = response.json()
         
         if "error" in data:
@@ -38,29 +92,43 @@ def fetch_weather_data(location: str):
 
 # --- Synthetic CCTV / Traffic Data ---
 # (We will upgrade this to Real TomTom Data in the next step)
+
+# time_of_day -> (congestion range, crowd range); anything else uses "day"
+_TIME_OF_DAY_PROFILES = {
+    "peak_morning": ((0.7, 0.95), (50, 150)),
+    "night": ((0.1, 0.3), (5, 20)),
+    "day": ((0.3, 0.7), (20, 80)),
+}
+
+_rng = np.random.default_rng()
+
+def generate_synthetic_cctv_batch(count: int, time_of_day: str = "day") -> list:
+    """
+    Generates `count` synthetic CCTV samples at once, drawing each field for
+    the whole batch in a single vectorised call.
+    """
+    congestion_range, crowd_range = _TIME_OF_DAY_PROFILES.get(time_of_day, _TIME_OF_DAY_PROFILES["day"])
+    vehicles = _rng.integers(10, 51, count).tolist()
+    congestion = _rng.uniform(*congestion_range, count).round(2).tolist()  # 0.0 to 1.0
+    crowd = _rng.integers(crowd_range[0], crowd_range[1] + 1, count).tolist()
+    speed = _rng.integers(10, 61, count).tolist()
+    incidents = (_rng.random(count) < 0.25).tolist()  # 25% chance of incident
+
+    return [
+        {
+            "detected_objects": ["car", "bus", "pedestrian", "bike"],
+            "vehicle_count": v,
+            "congestion_level": c,
+            "estimated_crowd_density": p,
+            "average_speed_kmh": s,
+            "incident_detected": i,
+        }
+        for v, c, p, s, i in zip(vehicles, congestion, crowd, speed, incidents)
+    ]
+
 @tool
 def get_enhanced_synthetic_cctv_data(time_of_day: str = "day"):
     """
     Generates synthetic CCTV analysis data for traffic and crowd density.
     """
-    import random
-    
-    # Simulate variations based on time
-    if time_of_day == "peak_morning":
-        congestion = random.uniform(0.7, 0.95)
-        crowd = random.randint(50, 150)
-    elif time_of_day == "night":
-        congestion = random.uniform(0.1, 0.3)
-        crowd = random.randint(5, 20)
-    else:
-        congestion = random.uniform(0.3, 0.7)
-        crowd = random.randint(20, 80)
-
-    return {
-        "detected_objects": ["car", "bus", "pedestrian", "bike"],
-        "vehicle_count": random.randint(10, 50),
-        "congestion_level": round(congestion, 2), # 0.0 to 1.0
-        "estimated_crowd_density": crowd,
-        "average_speed_kmh": random.randint(10, 60),
-        "incident_detected": random.choice([True, False, False, False]) # 25% chance of incident
-    }
\ No newline at end of file
+    return generate_synthetic_cctv_batch(1, time_of_day)[0]
@@ -1,44 +1,394 @@
 # tools/embedding_client.py
+import os
+import time
+import base64
+import asyncio
+import hashlib
+import threading
+import importlib.util
+import numpy as np
+from concurrent.futures import Future, ThreadPoolExecutor
+import orjson
 import requests
+import httpx
 import logging
-from typing import List, Dict, Any
+from collections import OrderedDict
+from typing import List, Dict, Any, Iterator, Optional, Tuple, TypedDict
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from . import local_embedding_backend
 
 # Configure the base URL for your new service
-EMBEDDING_SERVICE_URL = "http://127.0.0.1:8080"
+EMBEDDING_SERVICE_URL = os.getenv("EMBEDDING_SERVICE_URL", "http://127.0.0.1:8080")
+REQUEST_TIMEOUT = (1.0, 10.0)  # (connect, read) seconds
+# Unix socket the service listens on when co-located (uvicorn --uds PATH);
+# skips the TCP loopback stack and ephemeral ports. Used by the async client.
+EMBEDDING_SERVICE_UDS = os.getenv("EMBEDDING_SERVICE_UDS")
+POOL_MAXSIZE = 50  # pooled connections per host; also the fan-out thread count
+# Identifies the service's model in cache keys, so vectors from a different
+# model are never served for the same text
+EMBEDDING_MODEL_ID = os.getenv("EMBEDDING_MODEL_ID", "all-MiniLM-L6-v2")
+EMBED_CACHE_MAXSIZE = 4096
+# "remote" embeds through the microservice; "local" runs EMBEDDING_MODEL_ID
+# in this process (see local_embedding_backend). Query/upsert stay remote.
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "remote")
+# How outbound vectors are sent to /query and /upsert: "json" as a number
+# list (what the service accepts by default), or as base64 raw little-endian
+# bytes in `vector_b64` - "float32", "float16" (half the bytes again), or
+# "int8" (a quarter, with a per-vector `scale` to dequantize by). Cosine
+# similarity barely moves under fp16/int8.
+VECTOR_ENCODING = os.getenv("EMBEDDING_VECTOR_ENCODING", "json")
+VECTOR_ENCODINGS = ("json", "float32", "float16", "int8")
+if VECTOR_ENCODING not in VECTOR_ENCODINGS:
+    # Anything else would be sent as float32 bytes under a dtype label the
+    # service can't decode correctly
+    raise ValueError(
+        f"EMBEDDING_VECTOR_ENCODING must be one of {', '.join(VECTOR_ENCODINGS)}, got {VECTOR_ENCODING!r}"
+    )
 logger = logging.getLogger(__name__)
 
-def get_embedding_from_service(text: str) -> List[float]:
-    """Gets a vector embedding from the dedicated microservice."""
+# One keep-alive session for all calls, so each request reuses a pooled
+# connection instead of opening a new one. Closed via close_session().
+_SESSION = requests.Session()
+_ADAPTER = HTTPAdapter(
+    pool_connections=20,
+    pool_maxsize=POOL_MAXSIZE,
+    # POST is not retried by default; the service's endpoints are idempotent
+    max_retries=Retry(
+        total=3, connect=2, read=2, backoff_factor=0.25,
+        status_forcelist=[429, 502, 503, 504], allowed_methods={"POST", "GET"},
+    ),
+)
+_SESSION.mount("http://", _ADAPTER)
+_SESSION.mount("https://", _ADAPTER)
+_SESSION.headers.update({"Content-Type": "application/json", "Connection": "keep-alive"})
+
+# HTTP/2 multiplexes concurrent requests over one connection. httpx only
+# negotiates it over TLS and needs the optional h2 package, so it is on for
+# an https service URL when h2 is installed.
+_HTTP2 = EMBEDDING_SERVICE_URL.startswith("https://") and importlib.util.find_spec("h2") is not None
+
+# Async counterpart for callers on the event loop, so a round-trip to the
+# service never blocks other requests. Closed via aclose().
+_ACLIENT = httpx.AsyncClient(
+    base_url=EMBEDDING_SERVICE_URL,
+    timeout=httpx.Timeout(REQUEST_TIMEOUT[1], connect=REQUEST_TIMEOUT[0]),
+    # Pool limits live on the transport; a custom transport ignores the client's
+    transport=httpx.AsyncHTTPTransport(
+        retries=2,  # retries failed connects
+        http2=_HTTP2,
+        uds=EMBEDDING_SERVICE_UDS,
+        limits=httpx.Limits(max_connections=100, max_keepalive_connections=50),
+    ),
+    headers={"Content-Type": "application/json"},
+)
+
+# Bodies are encoded/decoded with orjson rather than the stdlib json behind
+# requests' json= and .json(); that matters for long float vectors. NumPy
+# arrays can be passed as vectors directly.
+def _dumps(payload) -> bytes:
+    return orjson.dumps(payload, option=orjson.OPT_SERIALIZE_NUMPY)
+
+# --- Request shapes ---
+# Typed so payload drift shows up in the editor; orjson encodes the plain
+# dicts directly in C, so there is no model layer to pay for at runtime.
+
+class VectorFields(TypedDict, total=False):
+    vector: List[float]      # "json" encoding
+    vector_b64: str          # any binary encoding
+    dtype: str
+    scale: float             # int8 only
+
+class EmbedRequest(TypedDict):
+    text: str
+
+class EmbedBatchRequest(TypedDict):
+    texts: List[str]
+
+class QueryRequest(VectorFields):
+    top_k: int
+
+class UpsertRequest(VectorFields):
+    report_id: str
+    metadata: Dict[str, Any]
+
+def _vector_fields(vector) -> VectorFields:
+    """Request fields carrying `vector` in the configured VECTOR_ENCODING."""
+    if VECTOR_ENCODING == "json":
+        return {"vector": vector}
+    v = np.asarray(vector, dtype="<f4")
+    fields = {"dtype": VECTOR_ENCODING}
+    if VECTOR_ENCODING == "float16":
+        v = v.astype("<f2")
+    elif VECTOR_ENCODING == "int8":
+        scale = float(np.abs(v).max(initial=0.0)) / 127 or 1.0  # initial: empty vectors
+        v = np.round(v / scale).astype(np.int8)
+        fields["scale"] = scale
+    fields["vector_b64"] = base64.b64encode(v.tobytes()).decode("ascii")
+    return fields
+
+class EmbedCache:
+    """In-memory LRU of embeddings keyed by a hash of (model id, text)."""
+
+    def __init__(self, maxsize: int = EMBED_CACHE_MAXSIZE):
+        self.maxsize = maxsize
+        self._vectors: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._lock = threading.Lock()  # shared with the fan-out threads
+
+    @staticmethod
+    def key(text: str, model_id: str = EMBEDDING_MODEL_ID) -> str:
+        return hashlib.sha256(f"{model_id}\0{text}".encode()).hexdigest()
+
+    def get(self, text: str) -> Optional[List[float]]:
+        key = self.key(text)
+        with self._lock:
+            vector = self._vectors.get(key)
+            if vector is not None:
+                self._vectors.move_to_end(key)
+        return vector
+
+    def put(self, text: str, vector: List[float]):
+        key = self.key(text)
+        with self._lock:
+            self._vectors[key] = vector
+            if len(self._vectors) > self.maxsize:
+                self._vectors.popitem(last=False)  # evict least recently used
+
+_embed_cache = EmbedCache()
+
+def _split_cached(texts: List[str]) -> tuple:
+    """Splits a batch into cached vectors and the unique texts still to embed."""
+    vectors = [_embed_cache.get(t) for t in texts]
+    missing = list(dict.fromkeys(t for t, v in zip(texts, vectors) if v is None))
+    return vectors, missing
+
+def _fill_missing(texts: List[str], vectors: list, missing: List[str], fetched: List[List[float]]) -> List[List[float]]:
+    """Caches freshly fetched vectors and merges them back into input order."""
+    found = dict(zip(missing, fetched))
+    for text, vector in found.items():
+        _embed_cache.put(text, vector)
+    return [v if v is not None else found[t] for t, v in zip(texts, vectors)]
+
+class CircuitBreaker:
+    """Fails fast once the service has failed `fail_max` times in a row,
+    letting calls through again after `reset_timeout` seconds; another
+    failure then re-opens it straight away."""
+
+    def __init__(self, fail_max: int = 5, reset_timeout: float = 10.0):
+        self.fail_max = fail_max
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+
+    def allow(self) -> bool:
+        return self._opened_at is None or time.monotonic() - self._opened_at >= self.reset_timeout
+
+    def record_success(self):
+        self._failures = 0
+        self._opened_at = None
+
+    def record_failure(self):
+        self._failures += 1
+        if self._failures >= self.fail_max:
+            self._opened_at = time.monotonic()
+
+_breaker = CircuitBreaker()
+
+def _is_service_fault(e: Exception) -> bool:
+    """4xx responses mean the service is up, so they don't trip the breaker."""
+    response = getattr(e, "response", None)
+    return response is None or response.status_code >= 500
+
+def _service_error(e: Exception, service: str) -> ConnectionError:
+    """Records a failed call and returns the ConnectionError to raise for it.
+    Transport retries have already run by now, so a service fault is logged
+    as an error; a 4xx is the caller's request, logged as a warning."""
+    if _is_service_fault(e):
+        _breaker.record_failure()
+        logger.error("API call to %s service failed: %s", service, e)
+    else:
+        logger.warning("API call to %s service was rejected: %s", service, e)
+    return ConnectionError(f"Could not connect to the {service} service.")
+
+def _circuit_open(service: str) -> ConnectionError:
+    logger.debug("Skipping %s service call, circuit open", service)
+    return ConnectionError(f"The {service} service is unavailable (circuit open).")
+
+# Bounded pool for fanning out blocking calls from sync code. Sized to the
+# connection pool so every worker can hold a keep-alive connection.
+_EXEC = ThreadPoolExecutor(max_workers=POOL_MAXSIZE, thread_name_prefix="embclient")
+
+def close_session():
+    _EXEC.shutdown(wait=False, cancel_futures=True)
+    _SESSION.close()
+
+async def aclose():
+    await _ACLIENT.aclose()
+
+def _query_request(vector, top_k: int) -> QueryRequest:
+    return {**_vector_fields(vector), "top_k": top_k}
+
+def _upsert_request(report_id: str, vector, metadata: Dict[str, Any]) -> UpsertRequest:
+    return {"report_id": report_id, **_vector_fields(vector), "metadata": metadata}
+
+def _post(path: str, payload: dict, service: str, read_body: bool = True):
+    """POSTs `payload` to the service and returns the decoded JSON body,
+    or just True when `read_body` is off (e.g. a 204 from /upsert)."""
+    if not _breaker.allow():
+        raise _circuit_open(service)
     try:
-        response = requests.post(f"{EMBEDDING_SERVICE_URL}/embed", json={"text": text})
+        response = _SESSION.post(f"{EMBEDDING_SERVICE_URL}{path}", data=_dumps(payload), timeout=REQUEST_TIMEOUT)
         response.raise_for_status() # Raises an exception for bad status codes
-        return response.json()
-    except requests.RequestException as e:
-        logger.error(f"API call to embedding service failed: {e}")
-        raise ConnectionError("Could not connect to the embedding service.") from e
+        body = orjson.loads(response.content) if read_body else True
+    except (requests.RequestException, orjson.JSONDecodeError) as e:
+        raise _service_error(e, service) from e
+    _breaker.record_success()
+    return body
 
-def query_service_for_incidents(vector: List[float], top_k: int = 3) -> List[Dict[str, Any]]:
-    """Queries for similar incidents via the dedicated microservice."""
+async def _apost(path: str, payload: dict, service: str, read_body: bool = True):
+    """Async version of _post."""
+    if not _breaker.allow():
+        raise _circuit_open(service)
     try:
-        response = requests.post(
-            f"{EMBEDDING_SERVICE_URL}/query",
-            json={"vector": vector, "top_k": top_k}
-        )
+        response = await _ACLIENT.post(path, content=_dumps(payload))
         response.raise_for_status()
-        return response.json().get("matches", [])
-    except requests.RequestException as e:
-        logger.error(f"API call to query service failed: {e}")
-        raise ConnectionError("Could not connect to the query service.") from e
+        body = orjson.loads(response.content) if read_body else True
+    except (httpx.HTTPError, orjson.JSONDecodeError) as e:
+        raise _service_error(e, service) from e
+    _breaker.record_success()
+    return body
 
-def upsert_incident_to_service(report_id: str, vector: List[float], metadata: Dict[str, Any]):
-    """Upserts an incident report via the dedicated microservice."""
+def get_embedding_from_service(text: str) -> List[float]:
+    """Gets a vector embedding from the dedicated microservice."""
+    cached = _embed_cache.get(text)
+    if cached is not None:
+        return cached
+    if EMBEDDING_BACKEND == "local":
+        vector = local_embedding_backend.embed([text], EMBEDDING_MODEL_ID)[0]
+    else:
+        vector = _post("/embed", EmbedRequest(text=text), "embedding")
+    _embed_cache.put(text, vector)
+    return vector
+
+def get_embeddings_batch(texts: List[str]) -> List[List[float]]:
+    """Embeds several texts in one request, returning vectors in input order.
+    Only texts missing from the local cache are sent to the service."""
+    vectors, missing = _split_cached(texts)
+    if not missing:
+        return vectors
+    if EMBEDDING_BACKEND == "local":
+        fetched = local_embedding_backend.embed(missing, EMBEDDING_MODEL_ID)
+    else:
+        fetched = _post("/embed_batch", EmbedBatchRequest(texts=missing), "embedding")
+    return _fill_missing(texts, vectors, missing, fetched)
+
+def iter_incidents(vector: List[float], top_k: int = 3) -> Iterator[Dict[str, Any]]:
+    """Yields similar incidents as they arrive. An ndjson response is parsed
+    one match per line, so callers can stop early without reading the rest;
+    a plain JSON response is parsed whole. Yields nothing while the service
+    is known to be down."""
+    if not _breaker.allow():
+        logger.debug("Skipping query service call, circuit open")
+        return
     try:
-        response = requests.post(
-            f"{EMBEDDING_SERVICE_URL}/upsert",
-            json={"report_id": report_id, "vector": vector, "metadata": metadata}
-        )
-        response.raise_for_status()
-        return response.json()
-    except requests.RequestException as e:
-        logger.error(f"API call to upsert service failed: {e}")
-        raise ConnectionError("Could not connect to the upsert service.") from e
\ No newline at end of file
+        with _SESSION.post(
+            f"{EMBEDDING_SERVICE_URL}/query",
+            data=_dumps(_query_request(vector, top_k)),
+            headers={"Accept": "application/x-ndjson, application/json"},
+            timeout=REQUEST_TIMEOUT,
+            stream=True,
+        ) as response:
+            response.raise_for_status()
+            # Recorded before the first yield: a caller that stops early
+            # closes the generator at a yield, so code after it never runs
+            _breaker.record_success()
+            if response.headers.get("Content-Type", "").startswith("application/x-ndjson"):
+                for line in response.iter_lines():
+                    if line:
+                        yield orjson.loads(line)
+            else:
+                yield from orjson.loads(response.content).get("matches", [])
+    except (requests.RequestException, orjson.JSONDecodeError) as e:
+        raise _service_error(e, "query") from e
+
+def query_service_for_incidents(vector: List[float], top_k: int = 3) -> List[Dict[str, Any]]:
+    """Queries for similar incidents via the dedicated microservice.
+    Returns no matches while the service is known to be down."""
+    return list(iter_incidents(vector, top_k))
+
+def upsert_incident_to_service(report_id: str, vector: List[float], metadata: Dict[str, Any]):
+    """Upserts an incident report via the dedicated microservice.
+    Returns True once stored; the response body is never parsed."""
+    return _post("/upsert", _upsert_request(report_id, vector, metadata), "upsert", read_body=False)
+
+# --- Background submission (for sync callers fanning out many requests) ---
+
+def submit_get_embedding(text: str) -> Future:
+    return _EXEC.submit(get_embedding_from_service, text)
+
+def submit_query(vector: List[float], top_k: int = 3) -> Future:
+    return _EXEC.submit(query_service_for_incidents, vector, top_k)
+
+def submit_upsert(report_id: str, vector: List[float], metadata: Dict[str, Any]) -> Future:
+    return _EXEC.submit(upsert_incident_to_service, report_id, vector, metadata)
+
+# --- Async variants ---
+
+# Embeds currently in flight, by cache key. Concurrent callers asking for the
+# same text await the one request already running instead of sending another.
+_inflight: Dict[str, "asyncio.Task[List[float]]"] = {}
+
+async def _aembed_one(text: str) -> List[float]:
+    if EMBEDDING_BACKEND == "local":
+        vector = (await local_embedding_backend.aembed([text], EMBEDDING_MODEL_ID))[0]
+    else:
+        vector = await _apost("/embed", EmbedRequest(text=text), "embedding")
+    _embed_cache.put(text, vector)
+    return vector
+
+async def aget_embedding_from_service(text: str) -> List[float]:
+    """Async version of get_embedding_from_service."""
+    cached = _embed_cache.get(text)
+    if cached is not None:
+        return cached
+    key = EmbedCache.key(text)
+    task = _inflight.get(key)
+    if task is None:
+        task = _inflight[key] = asyncio.ensure_future(_aembed_one(text))
+        task.add_done_callback(lambda _: _inflight.pop(key, None))
+    # Shielded so one caller being cancelled doesn't cancel it for the rest
+    return await asyncio.shield(task)
+
+async def aget_embeddings_batch(texts: List[str]) -> List[List[float]]:
+    """Async version of get_embeddings_batch."""
+    vectors, missing = _split_cached(texts)
+    if not missing:
+        return vectors
+    if EMBEDDING_BACKEND == "local":
+        fetched = await local_embedding_backend.aembed(missing, EMBEDDING_MODEL_ID)
+    else:
+        fetched = await _apost("/embed_batch", EmbedBatchRequest(texts=missing), "embedding")
+    return _fill_missing(texts, vectors, missing, fetched)
+
+async def aquery_service_for_incidents(vector: List[float], top_k: int = 3) -> List[Dict[str, Any]]:
+    """Async version of query_service_for_incidents."""
+    if not _breaker.allow():
+        logger.debug("Skipping query service call, circuit open")
+        return []
+    body = await _apost("/query", _query_request(vector, top_k), "query")
+    return body.get("matches", [])
+
+async def aupsert_incident_to_service(report_id: str, vector: List[float], metadata: Dict[str, Any]):
+    """Async version of upsert_incident_to_service."""
+    return await _apost("/upsert", _upsert_request(report_id, vector, metadata), "upsert", read_body=False)
+
+async def aupsert_many(items: List[Tuple[str, List[float], Dict[str, Any]]], concurrency: int = 16) -> list:
+    """Upserts many (report_id, vector, metadata) records concurrently,
+    with at most `concurrency` requests in flight."""
+    sem = asyncio.Semaphore(concurrency)
+
+    async def _one(item):
+        async with sem:
+            return await aupsert_incident_to_service(*item)
+
+    return await asyncio.gather(*(_one(item) for item in items))
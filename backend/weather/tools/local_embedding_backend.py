@@ -0,0 +1,29 @@
+# tools/local_embedding_backend.py
+import asyncio
+import threading
+from typing import List
+
+# In-process alternative to the embedding microservice for when it would run
+# on this host anyway: no HTTP hop, no JSON round-trip of the vectors.
+# sentence_transformers (and torch) are imported on first use only, so
+# importing this module never triggers the torch import hang.
+_models = {}
+_load_lock = threading.Lock()
+
+def _get_model(model_id: str):
+    model = _models.get(model_id)
+    if model is None:
+        with _load_lock:
+            model = _models.get(model_id)
+            if model is None:
+                from sentence_transformers import SentenceTransformer
+                model = _models[model_id] = SentenceTransformer(model_id)
+    return model
+
+def embed(texts: List[str], model_id: str) -> List[List[float]]:
+    """Embeds the texts with one batched forward pass."""
+    return _get_model(model_id).encode(texts, batch_size=32, convert_to_numpy=True).tolist()
+
+async def aembed(texts: List[str], model_id: str) -> List[List[float]]:
+    """Runs embed() in a worker thread so inference never blocks the event loop."""
+    return await asyncio.to_thread(embed, texts, model_id)
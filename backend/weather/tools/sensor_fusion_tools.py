@@ -1,102 +1,196 @@
 import json
+import bisect
 import logging
+import itertools
 from datetime import datetime, timezone
-from typing import Dict, Any, List, Union
+from types import MappingProxyType
+from typing import Dict, Any, List, Union, TypedDict
+
+import orjson
 
 # Configure logging for sensor fusion operations
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Shape of state["fused_environmental_state"]. It stays a plain dict (it is
+# part of the agent state and read by anomaly_detection_tools); these types
+# just document the fields the downstream steps read.
+
+class WeatherContext(TypedDict, total=False):
+    condition: str              # lowercased
+    adverse_condition: bool     # rain or snow in the condition
+    temperature_celsius: float
+    wind_kph: float
+    humidity_percent: int
+    air_quality_index: int
+    data_source: str
+    quality_weight: float
+
+class TrafficContext(TypedDict, total=False):
+    pedestrian_count: int
+    vehicle_count: int
+    congestion_level: float
+    incident_detected: bool
+    incident_details: Any
+    zone_id: str
+    data_source: str
+    quality_weight: float
+
+class EnvironmentalContext(TypedDict, total=False):
+    air_quality_index: int
+    noise_level_db: int
+    ambient_light_lux: int
+    zone_id: str
+    additional_metrics: Dict[str, Any]
+    data_source: str
+    quality_weight: float
+
+class FusedEnvironmentalState(TypedDict):
+    zone_id: str
+    timestamp_utc: str
+    weather_context: WeatherContext
+    traffic_context: TrafficContext
+    environmental_context: EnvironmentalContext
+    fusion_metadata: Dict[str, Any]
+
+# Shape of state["comprehensive_fusion_report"], likewise kept a plain dict
+# so it goes straight to the orjson response encoder.
+
+class ReportFusedState(TypedDict):
+    zone_id: str
+    timestamp_utc: str
+    weather_context: WeatherContext
+    traffic_context: TrafficContext
+    environmental_context: EnvironmentalContext
+
+class ReportDerivedAnalytics(TypedDict):
+    situational_awareness_score: float
+    summary: str
+    data_quality_check: Dict[str, str]
+    cross_sensor_validation: Dict[str, Any]
+    preprocessing_impact_analysis: Dict[str, Any]
+
+class ReportMetadata(TypedDict):
+    request_parameters: Dict[str, Any]
+    processing_pipeline: Dict[str, bool]
+    data_quality_summary: Dict[str, Any]
+    fusion_statistics: Dict[str, int]
+    generation_timestamp: str
+
+class ComprehensiveReport(TypedDict):
+    fused_environmental_state: ReportFusedState
+    derived_analytics: ReportDerivedAnalytics
+    metadata: ReportMetadata
+
+def _loads_dict(raw: str):
+    """
+    Parse a JSON object string, or None if it is not one. Not cached: the
+    pipeline stores pieces of the parsed dict in state, so every caller
+    needs its own copy.
+    """
+    try:
+        loaded = orjson.loads(raw)
+    except orjson.JSONDecodeError:
+        # orjson rejects the NaN/Infinity tokens stdlib json.dumps emits for
+        # bad sensor readings; let json decide before giving up on the string
+        try:
+            loaded = json.loads(raw)
+        except json.JSONDecodeError:
+            return None
+    return loaded if isinstance(loaded, dict) else None
+
 def safe_get_data_helper(raw: Union[str, Dict[str, Any], None], default: Dict[str, Any] = None) -> Dict[str, Any]:
     """
     Safely coerce a dict-like object possibly stored as a JSON string into a dict.
     """
+    if type(raw) is dict:  # fast path: values the pipeline itself wrote
+        return raw
     if default is None:
         default = {}
-    if raw is None:
-        return default
     if isinstance(raw, dict):
         return raw
     if isinstance(raw, str):
-        try:
-            loaded = json.loads(raw)
-            return loaded if isinstance(loaded, dict) else default
-        except json.JSONDecodeError:
-            return default
+        loaded = _loads_dict(raw)
+        return loaded if loaded is not None else default
     return default
 
+def _count_fused_sources(fused_state: Dict[str, Any]) -> int:
+    """Number of non-empty sensor contexts in a fused state."""
+    return (bool(fused_state.get("weather_context"))
+            + bool(fused_state.get("traffic_context"))
+            + bool(fused_state.get("environmental_context")))
+
+def _num(d: Dict[str, Any], key: str):
+    """Return d[key] if it is a plain int/float, else None."""
+    v = d.get(key)
+    return v if type(v) in (int, float) else None
+
+# Lower bound of each level above "unknown"; a score equal to a bound is in that level
+_LEVEL_THRESHOLDS = (0.0, 0.45, 0.7, 0.85)
+_LEVEL_NAMES = ("unknown", "low", "moderate", "high", "critical")
+
+def _adverse_condition(weather_ctx: WeatherContext, cond: str) -> bool:
+    """Rain/snow flag computed at fusion time; derived from `cond` for contexts built elsewhere."""
+    adverse = weather_ctx.get("adverse_condition")
+    return ("rain" in cond or "snow" in cond) if adverse is None else adverse
+
 def get_situation_level(score: float) -> str:
     """
     Map awareness score [0..1] to a qualitative level.
     """
-    if score >= 0.85:
-        return "critical"
-    if score >= 0.7:
-        return "high"
-    if score >= 0.45:
-        return "moderate"
-    if score > 0.0:
-        return "low"
-    return "unknown"
+    if not score > 0.0:  # also catches NaN
+        return "unknown"
+    return _LEVEL_NAMES[bisect.bisect_right(_LEVEL_THRESHOLDS, score)]
 
 
 def generate_situation_context(
-    weather_ctx: Dict[str, Any],
-    traffic_ctx: Dict[str, Any],
-    env_ctx: Dict[str, Any],
+    weather_ctx: WeatherContext,
+    traffic_ctx: TrafficContext,
+    env_ctx: EnvironmentalContext,
     final_score: float
 ) -> Dict[str, Any]:
     """
     Produce a compact, human-friendly context block summarizing the situation.
     """
-    summary_bits: List[str] = []
-
-    # Weather
-    cond = str(weather_ctx.get("condition", "unknown"))
-    temp = weather_ctx.get("temperature_celsius", None)
-    wind = weather_ctx.get("wind_kph", None)
-    if cond != "unknown":
-        summary_bits.append(f"weather={cond}")
-    if isinstance(temp, (int, float)):
-        summary_bits.append(f"temp={temp}°C")
-    if isinstance(wind, (int, float)) and wind > 0:
-        summary_bits.append(f"wind={wind} kph")
-
-    # Traffic
-    cong = traffic_ctx.get("congestion_level", None)
-    peds = traffic_ctx.get("pedestrian_count", None)
-    veh = traffic_ctx.get("vehicle_count", None)
+    # Unpack every field once; non-numeric values come back as None
+    cond = str(weather_ctx.get("condition", "unknown")).lower()
+    temp = _num(weather_ctx, "temperature_celsius")
+    wind = _num(weather_ctx, "wind_kph")
+    cong = _num(traffic_ctx, "congestion_level")
+    peds = _num(traffic_ctx, "pedestrian_count")
+    veh = _num(traffic_ctx, "vehicle_count")
     inc = traffic_ctx.get("incident_detected", False)
-    if isinstance(cong, (int, float)):
-        summary_bits.append(f"congestion={round(cong, 2)}")
-    if isinstance(peds, (int, float)) and peds:
-        summary_bits.append(f"peds={int(peds)}")
-    if isinstance(veh, (int, float)) and veh:
-        summary_bits.append(f"vehicles={int(veh)}")
-    if inc:
-        summary_bits.append("incident=yes")
-
-    # Environment
-    aqi = env_ctx.get("air_quality_index", None)
-    noise = env_ctx.get("noise_level_db", None)
-    light = env_ctx.get("ambient_light_lux", None)
-    if isinstance(aqi, (int, float)):
-        summary_bits.append(f"aqi={int(aqi)}")
-    if isinstance(noise, (int, float)):
-        summary_bits.append(f"noise={int(noise)} dB")
-    if isinstance(light, (int, float)):
-        summary_bits.append(f"light={int(light)} lux")
+    aqi = _num(env_ctx, "air_quality_index")
+    noise = _num(env_ctx, "noise_level_db")
+    light = _num(env_ctx, "ambient_light_lux")
+
+    summary_bits: List[str] = [bit for bit in (
+        # Weather
+        cond != "unknown" and f"weather={cond}",
+        temp is not None and f"temp={temp}°C",
+        wind is not None and wind > 0 and f"wind={wind} kph",
+        # Traffic
+        cong is not None and f"congestion={cong:.2f}",
+        peds and f"peds={int(peds)}",
+        veh and f"vehicles={int(veh)}",
+        inc and "incident=yes",
+        # Environment
+        aqi is not None and f"aqi={int(aqi)}",
+        noise is not None and f"noise={int(noise)} dB",
+        light is not None and f"light={int(light)} lux",
+    ) if bit]
 
     level = get_situation_level(final_score)
+    score = round(final_score, 3)
     return {
-        "summary": f"level={level}; score={round(final_score, 3)}; " + ", ".join(summary_bits),
+        "summary": "; ".join((f"level={level}", f"score={score}", ", ".join(summary_bits))),
         "level": level,
-        "score": round(final_score, 3),
+        "score": score,
         "highlights": {
-            "adverse_weather": ("rain" in cond or "snow" in cond or (isinstance(wind, (int, float)) and wind > 25)),
+            "adverse_weather": (_adverse_condition(weather_ctx, cond) or (wind is not None and wind > 25)),
             "traffic_incident": bool(inc),
-            "air_quality_concern": (isinstance(aqi, (int, float)) and aqi > 100),
-            "low_light": (isinstance(light, (int, float)) and light < 50),
+            "air_quality_concern": (aqi is not None and aqi > 100),
+            "low_light": (light is not None and light < 50),
         }
     }
 
@@ -119,23 +213,62 @@ def analyze_preprocessing_impact_detailed(
     dropped_points = int(processing_summary.get("dropped_points", qr.get("dropped_points", 0) or 0))
     smoothing = bool(processing_summary.get("smoothing_applied", qr.get("smoothing_applied", False) or False))
 
-    # Validation signals
-    vr_notes = []
-    for k, v in (vr or {}).items():
-        if isinstance(v, dict) and "status" in v:
-            vr_notes.append(f"{k}:{v.get('status')}")
-        elif isinstance(v, str):
-            vr_notes.append(f"{k}:{v}")
+    # Validation signals (keep concise: stop after the first six)
+    vr_notes = list(itertools.islice(
+        (f"{k}:{v.get('status') if isinstance(v, dict) else v}"
+         for k, v in vr.items()
+         if (isinstance(v, dict) and "status" in v) or isinstance(v, str)),
+        6,
+    ))
 
     return {
         "outliers_corrected": outliers_corrected,
         "imputations": imputations,
         "dropped_points": dropped_points,
         "smoothing_applied": smoothing,
-        "validation_summary": vr_notes[:6],  # keep concise
+        "validation_summary": vr_notes,
         "notes": processing_summary.get("notes", qr.get("notes", "")),
     }
 
+# Situational awareness scoring tables: (field, default, low, high, weight).
+# A reading below `low` or above `high` adds `weight` to its component.
+_INF = float("inf")
+_WEATHER_RULES = (
+    ("temperature_celsius", 20, 5, 35, 0.15),   # Extreme temperatures
+    ("wind_kph", 0, -_INF, 25, 0.1),            # High wind conditions
+    ("humidity_percent", 50, 20, 85, 0.05),     # Extreme humidity
+)
+_TRAFFIC_RULES = (
+    ("pedestrian_count", 0, -_INF, 40, 0.1),    # High pedestrian activity
+    ("vehicle_count", 0, -_INF, 80, 0.05),      # High vehicle count
+)
+_ENVIRONMENTAL_RULES = (
+    ("air_quality_index", 50, -_INF, 100, 0.15),  # Poor air quality
+    ("noise_level_db", 50, -_INF, 70, 0.1),       # High noise levels
+    ("ambient_light_lux", 200, 50, _INF, 0.05),   # Low light conditions
+)
+
+def _rule_score(ctx: Dict[str, Any], rules, score: float = 0.0) -> float:
+    for key, default, low, high, weight in rules:
+        value = ctx.get(key, default)
+        if value < low or value > high:
+            score += weight
+    return score
+
+# Error results share fixed fields; each except block copies its skeleton
+# and fills in the message. Mutable fields are added per call.
+_FUSION_ERROR = {"status": "error", "message": "", "sources_fused": 0}
+_AWARENESS_ERROR = {"status": "error", "message": "", "awareness_score": 0.0, "situation_level": "unknown"}
+_VALIDATION_ERROR = {"status": "error", "message": "", "correlations_checked": 0,
+                     "consistency_score": 0.0, "anomalies_detected": 0}
+_ANALYTICS_ERROR = {"status": "error", "message": "", "insights_generated": 0,
+                    "recommendations_count": 0, "quality_status": "ERROR"}
+_REPORT_ERROR = {"status": "error", "message": "", "fusion_complete": False}
+
+# Read-only default for .get() lookups that are only walked further, never
+# stored in a result (a mappingproxy must not reach the JSON encoder)
+_EMPTY = MappingProxyType({})
+
 # ------------------------------------------------------- #
 # ENHANCEMENT 1: Comprehensive sensor fusion pipeline tool
 # ------------------------------------------------------- #
@@ -148,17 +281,22 @@ def process_complete_sensor_fusion(state: dict) -> Dict[str, Any]:
     logger.info("Starting complete sensor fusion pipeline")
 
     try:
+        # One timestamp for the whole run, shared by every step
+        ts = datetime.now(timezone.utc).isoformat()
+        # Parse the quality report once; the steps below would each re-read it
+        quality_report = safe_get_data_helper(state.get("quality_report"))
+
         # Step 1: Fuse environmental state
-        fusion_result = fuse_environmental_state(state)
+        fusion_result = fuse_environmental_state(state, ts, quality_report)
 
         # Step 2: Calculate situational awareness
-        awareness_result = calculate_situational_awareness(state)
+        awareness_result = calculate_situational_awareness(state, ts, quality_report=quality_report)
 
         # Step 3: Perform cross-sensor validation
         validation_result = perform_cross_sensor_validation(state)
 
         # Step 4: Generate comprehensive analytics
-        analytics_result = generate_derived_analytics(state)
+        analytics_result = generate_derived_analytics(state, ts, quality_report)
 
         # Compile comprehensive fusion report
         fusion_report = {
@@ -170,7 +308,7 @@ def process_complete_sensor_fusion(state: dict) -> Dict[str, Any]:
                 "cross_validation": validation_result,
                 "derived_analytics": analytics_result
             },
-            "execution_timestamp": datetime.now(timezone.utc).isoformat()
+            "execution_timestamp": ts
         }
 
         # Save fusion report to state
@@ -189,26 +327,20 @@ def process_complete_sensor_fusion(state: dict) -> Dict[str, Any]:
         logger.error(f"Sensor fusion pipeline failed: {e}")
         return error_report
 
-def fuse_environmental_state(state: dict) -> Dict[str, Any]:
+def fuse_environmental_state(state: dict, ts: str = None,
+                             quality_report: Dict[str, Any] = None) -> Dict[str, Any]:
     """
     Fuse preprocessed sensor data into unified environmental state.
     Enhanced with quality-weighted fusion and comprehensive metadata.
     """
+    ts = ts or datetime.now(timezone.utc).isoformat()
     try:
         # Read preprocessed data from state
-        def safe_get_data(key, default={}):
-            raw_data = state.get(key, default)
-            if isinstance(raw_data, str):
-                try:
-                    return json.loads(raw_data)
-                except json.JSONDecodeError:
-                    return default
-            return raw_data if isinstance(raw_data, dict) else default
-
-        filtered_data = safe_get_data("filtered_data")
-        quality_report = safe_get_data("quality_report")
-        validation_report = safe_get_data("validation_report")
-        extracted_params = safe_get_data("extracted_params")
+        filtered_data = safe_get_data_helper(state.get("filtered_data"))
+        if quality_report is None:
+            quality_report = safe_get_data_helper(state.get("quality_report"))
+        validation_report = safe_get_data_helper(state.get("validation_report"))
+        extracted_params = safe_get_data_helper(state.get("extracted_params"))
 
         # Get quality weights for fusion
         overall_quality = quality_report.get("overall_quality", 0.5) if quality_report else 0.5
@@ -217,6 +349,7 @@ def fuse_environmental_state(state: dict) -> Dict[str, Any]:
             "cctv": 1.0,
             "iot_data": 1.0
         }
+        quality_weighted = False
 
         # Adjust weights based on validation results
         if validation_report:
@@ -226,13 +359,14 @@ def fuse_environmental_state(state: dict) -> Dict[str, Any]:
                     status = validation_report[validation_key].get("status", "VALID")
                     if status == "INVALID":
                         quality_weights[sensor_type if sensor_type != "iot" else "iot_data"] = 0.5
+                        quality_weighted = True
 
-        fusion_stats = {"sources_fused": 0, "fields_merged": 0, "quality_weighted": False, "errors": []}
+        fusion_stats = {"sources_fused": 0, "fields_merged": 0, "quality_weighted": quality_weighted, "errors": []}
 
         # Initialize fused environmental state
-        fused_state = {
+        fused_state: FusedEnvironmentalState = {
             "zone_id": str(extracted_params.get("zone_id", "unknown")) if extracted_params else "unknown",
-            "timestamp_utc": datetime.now(timezone.utc).isoformat(),
+            "timestamp_utc": ts,
             "weather_context": {},
             "traffic_context": {},
             "environmental_context": {},
@@ -243,13 +377,19 @@ def fuse_environmental_state(state: dict) -> Dict[str, Any]:
             }
         }
 
-        # Fuse weather data with quality weighting
+        # Fuse weather data with quality weighting. The float() coercions stay:
+        # on a value that already is a float they are cheaper than any
+        # type-check fast path, and they turn bad strings into fusion errors.
+        # The contexts stay dict literals: a literal compiles to one map
+        # build, which beats dict(zip(KEYS, values)) by more than 2x.
         weather_data = filtered_data.get("weather", {})
         if weather_data and quality_weights["weather"] > 0:
             try:
                 weight = quality_weights["weather"]
+                cond = str(weather_data.get("condition", "unknown")).lower()
                 fused_state["weather_context"] = {
-                    "condition": str(weather_data.get("condition", "unknown")).lower(),
+                    "condition": cond,
+                    "adverse_condition": "rain" in cond or "snow" in cond,
                     "temperature_celsius": round(float(weather_data.get("temperature_celsius", 20)) * weight, 2),
                     "wind_kph": round(float(weather_data.get("wind_kph", 0)) * weight, 2),
                     "humidity_percent": int(float(weather_data.get("humidity_percent", 50)) * weight),
@@ -303,9 +443,6 @@ def fuse_environmental_state(state: dict) -> Dict[str, Any]:
             except Exception as e:
                 fusion_stats["errors"].append(f"IoT fusion error: {str(e)}")
 
-        # Mark if quality weighting was applied
-        fusion_stats["quality_weighted"] = any(w != 1.0 for w in quality_weights.values())
-
         # SAVE TO STATE
         state["fused_environmental_state"] = fused_state
         state["fusion_stats"] = fusion_stats
@@ -321,25 +458,24 @@ def fuse_environmental_state(state: dict) -> Dict[str, Any]:
         }
 
     except Exception as e:
-        error_result = {
-            "status": "error",
-            "message": f"Environmental fusion failed: {str(e)}",
-            "sources_fused": 0,
-            "fusion_stats": {"sources_fused": 0, "fields_merged": 0, "quality_weighted": False, "errors": [str(e)]}
-        }
+        error_result = {**_FUSION_ERROR, "message": f"Environmental fusion failed: {str(e)}"}
+        error_result["fusion_stats"] = {"sources_fused": 0, "fields_merged": 0, "quality_weighted": False, "errors": [str(e)]}
         state["fusion_error"] = error_result
         logger.error(f"Environmental fusion failed: {e}")
         return error_result
 
-def calculate_situational_awareness(state: dict) -> Dict[str, Any]:
+def calculate_situational_awareness(state: dict, ts: str = None,
+                                    quality_report: Dict[str, Any] = None) -> Dict[str, Any]:
     """
     Calculate situational awareness score with preprocessing quality integration.
     Enhanced with comprehensive scoring methodology.
     """
+    ts = ts or datetime.now(timezone.utc).isoformat()
     try:
         # Read fused environmental state
         fused_state = safe_get_data_helper(state.get("fused_environmental_state", {}))
-        quality_report = safe_get_data_helper(state.get("quality_report", {}))
+        if quality_report is None:
+            quality_report = safe_get_data_helper(state.get("quality_report", {}))
 
         if not fused_state:
             raise ValueError("No fused environmental state available")
@@ -350,63 +486,29 @@ def calculate_situational_awareness(state: dict) -> Dict[str, Any]:
         env_ctx = fused_state.get("environmental_context", {})
 
         # Base situational awareness calculation
-        score = 0.0
-        score_components = {"weather": 0.0, "traffic": 0.0, "environmental": 0.0, "quality_adjustment": 0.0}
-
         # Weather impact (0.0-0.3)
-        temp = weather_ctx.get('temperature_celsius', 20)
-        wind = weather_ctx.get('wind_kph', 0)
-        humidity = weather_ctx.get('humidity_percent', 50)
-
-        weather_score = 0.0
-        if temp < 5 or temp > 35:  # Extreme temperatures
-            weather_score += 0.15
-        if wind > 25:  # High wind conditions
-            weather_score += 0.1
-        if humidity > 85 or humidity < 20:  # Extreme humidity
-            weather_score += 0.05
-
-        score_components["weather"] = weather_score
-        score += weather_score
+        weather_score = _rule_score(weather_ctx, _WEATHER_RULES)
 
         # Traffic impact (0.0-0.4)
-        congestion = traffic_ctx.get('congestion_level', 0)
-        pedestrians = traffic_ctx.get('pedestrian_count', 0)
-        vehicles = traffic_ctx.get('vehicle_count', 0)
-        incident = traffic_ctx.get('incident_detected', False)
-
-        traffic_score = float(congestion) * 0.25  # Direct congestion impact
-        if pedestrians > 40:  # High pedestrian activity
-            traffic_score += 0.1
-        if vehicles > 80:  # High vehicle count
-            traffic_score += 0.05
-        if incident:  # Incident detected
+        traffic_score = float(traffic_ctx.get('congestion_level', 0)) * 0.25  # Direct congestion impact
+        traffic_score = _rule_score(traffic_ctx, _TRAFFIC_RULES, traffic_score)
+        if traffic_ctx.get('incident_detected', False):  # Incident detected
             traffic_score += 0.2
 
-        score_components["traffic"] = traffic_score
-        score += traffic_score
-
         # Environmental impact (0.0-0.3)
-        aqi = env_ctx.get('air_quality_index', 50)
-        noise = env_ctx.get('noise_level_db', 50)
-        light = env_ctx.get('ambient_light_lux', 200)
-
-        env_score = 0.0
-        if aqi > 100:  # Poor air quality
-            env_score += 0.15
-        if noise > 70:  # High noise levels
-            env_score += 0.1
-        if light < 50:  # Low light conditions
-            env_score += 0.05
-
-        score_components["environmental"] = env_score
-        score += env_score
+        env_score = _rule_score(env_ctx, _ENVIRONMENTAL_RULES)
 
         # Quality adjustment (±0.1 based on preprocessing quality)
         overall_quality = quality_report.get("overall_quality", 0.5) if quality_report else 0.5
         quality_adjustment = (overall_quality - 0.5) * 0.2  # Scale to ±0.1
-        score_components["quality_adjustment"] = quality_adjustment
-        score += quality_adjustment
+
+        score = weather_score + traffic_score + env_score + quality_adjustment
+        score_components = {
+            "weather": weather_score,
+            "traffic": traffic_score,
+            "environmental": env_score,
+            "quality_adjustment": quality_adjustment,
+        }
 
         # Ensure score stays within bounds
         final_score = max(0.0, min(1.0, round(score, 3)))
@@ -419,7 +521,7 @@ def calculate_situational_awareness(state: dict) -> Dict[str, Any]:
             "score_components": score_components,
             "situation_context": situation_context,
             "quality_factor": overall_quality,
-            "calculation_timestamp": datetime.now(timezone.utc).isoformat()
+            "calculation_timestamp": ts
         }
 
         # SAVE TO STATE
@@ -436,13 +538,8 @@ def calculate_situational_awareness(state: dict) -> Dict[str, Any]:
         }
 
     except Exception as e:
-        error_result = {
-            "status": "error",
-            "message": f"Situational awareness calculation failed: {str(e)}",
-            "awareness_score": 0.0,
-            "situation_level": "unknown",
-            "score_breakdown": {}
-        }
+        error_result = {**_AWARENESS_ERROR, "message": f"Situational awareness calculation failed: {str(e)}"}
+        error_result["score_breakdown"] = {}
         state["situational_awareness_error"] = error_result
         logger.error(f"Situational awareness calculation failed: {e}")
         return error_result
@@ -466,6 +563,9 @@ def perform_cross_sensor_validation(state: dict) -> Dict[str, Any]:
         correlation_results: Dict[str, Any] = {}
         validation_stats = {"correlations_checked": 0, "logical_consistency_score": 0.0, "anomalies_detected": []}
 
+        # Shared by the traffic-environmental and weather-traffic checks
+        congestion = float(traffic_ctx.get("congestion_level", 0))
+
         # Weather-IoT correlation analysis
         if weather_ctx and env_ctx:
             weather_aqi = weather_ctx.get("air_quality_index", 50)
@@ -489,7 +589,6 @@ def perform_cross_sensor_validation(state: dict) -> Dict[str, Any]:
 
         # Traffic-Environmental correlation analysis
         if traffic_ctx and env_ctx:
-            congestion = float(traffic_ctx.get("congestion_level", 0))
             noise = float(env_ctx.get("noise_level_db", 50))
             vehicle_count = float(traffic_ctx.get("vehicle_count", 0))
 
@@ -514,11 +613,10 @@ def perform_cross_sensor_validation(state: dict) -> Dict[str, Any]:
         # Weather-Traffic correlation analysis
         if weather_ctx and traffic_ctx:
             weather_condition = str(weather_ctx.get("condition", "unknown"))
-            congestion = float(traffic_ctx.get("congestion_level", 0))
             wind = float(weather_ctx.get("wind_kph", 0))
 
             # Weather impact on traffic patterns
-            weather_impact_expected = ("rain" in weather_condition or "snow" in weather_condition or wind > 20)
+            weather_impact_expected = (_adverse_condition(weather_ctx, weather_condition) or wind > 20)
 
             weather_traffic_consistent = True
             if weather_impact_expected and congestion < 0.3:
@@ -565,28 +663,25 @@ def perform_cross_sensor_validation(state: dict) -> Dict[str, Any]:
         }
 
     except Exception as e:
-        error_result = {
-            "status": "error",
-            "message": f"Cross-sensor validation failed: {str(e)}",
-            "correlations_checked": 0,
-            "consistency_score": 0.0,
-            "anomalies_detected": 0
-        }
+        error_result = {**_VALIDATION_ERROR, "message": f"Cross-sensor validation failed: {str(e)}"}
         state["cross_validation_error"] = error_result
         logger.error(f"Cross-sensor validation failed: {e}")
         return error_result
 
-def generate_derived_analytics(state: dict) -> Dict[str, Any]:
+def generate_derived_analytics(state: dict, ts: str = None,
+                               quality_report: Dict[str, Any] = None) -> Dict[str, Any]:
     """
     Generate comprehensive derived analytics and insights.
     Enhanced with preprocessing impact analysis.
     """
+    ts = ts or datetime.now(timezone.utc).isoformat()
     try:
         # Read all necessary data
         fused_state = safe_get_data_helper(state.get("fused_environmental_state", {}))
         situational_awareness = safe_get_data_helper(state.get("situational_awareness", {}))
         cross_validation = safe_get_data_helper(state.get("cross_sensor_validation", {}))
-        quality_report = safe_get_data_helper(state.get("quality_report", {}))
+        if quality_report is None:
+            quality_report = safe_get_data_helper(state.get("quality_report", {}))
         validation_report = safe_get_data_helper(state.get("validation_report", {}))
 
         analytics: Dict[str, Any] = {
@@ -600,10 +695,9 @@ def generate_derived_analytics(state: dict) -> Dict[str, Any]:
         # Processing summary
         awareness_score = situational_awareness.get("situational_awareness_score", 0.0)
         analytics["processing_summary"] = {
-            "total_sensors_integrated": len([k for k in ["weather_context", "traffic_context", "environmental_context"]
-                                             if k in fused_state and fused_state[k]]),
+            "total_sensors_integrated": _count_fused_sources(fused_state),
             "situational_awareness_level": get_situation_level(awareness_score),
-            "data_fusion_timestamp": datetime.now(timezone.utc).isoformat(),
+            "data_fusion_timestamp": ts,
             "cross_validation_status": "PASSED" if cross_validation.get("overall_consistency", 0) > 0.7 else "WARNING"
         }
 
@@ -633,39 +727,30 @@ def generate_derived_analytics(state: dict) -> Dict[str, Any]:
         insights: List[str] = []
         risk_factors: List[str] = []
 
-        # Weather insights
-        temp = weather_ctx.get("temperature_celsius", 20)
-        wind = weather_ctx.get("wind_kph", 0)
-        if temp < 10:
-            insights.append("Cold weather conditions may affect pedestrian activity")
-            risk_factors.append("temperature")
-        if wind > 20:
-            insights.append("High wind conditions detected")
-            risk_factors.append("wind")
-
-        # Traffic insights
-        congestion = traffic_ctx.get("congestion_level", 0)
-        if congestion > 0.7:
-            insights.append("Heavy traffic congestion affecting area mobility")
-            risk_factors.append("congestion")
-        if traffic_ctx.get("incident_detected", False):
-            insights.append("Traffic incident requiring attention")
-            risk_factors.append("incident")
-
-        # Environmental insights
-        aqi = env_ctx.get("air_quality_index", 50)
-        noise = env_ctx.get("noise_level_db", 50)
-        if aqi > 100:
-            insights.append("Air quality concerns for sensitive individuals")
-            risk_factors.append("air_quality")
-        if noise > 75:
-            insights.append("Elevated noise levels detected")
-            risk_factors.append("noise")
+        # (triggered, insight, risk factor) for weather, traffic and environment
+        insight_checks = (
+            (weather_ctx.get("temperature_celsius", 20) < 10,
+             "Cold weather conditions may affect pedestrian activity", "temperature"),
+            (weather_ctx.get("wind_kph", 0) > 20, "High wind conditions detected", "wind"),
+            (traffic_ctx.get("congestion_level", 0) > 0.7,
+             "Heavy traffic congestion affecting area mobility", "congestion"),
+            (traffic_ctx.get("incident_detected", False), "Traffic incident requiring attention", "incident"),
+            (env_ctx.get("air_quality_index", 50) > 100,
+             "Air quality concerns for sensitive individuals", "air_quality"),
+            (env_ctx.get("noise_level_db", 50) > 75, "Elevated noise levels detected", "noise"),
+        )
+        for triggered, insight, risk in insight_checks:
+            if triggered:
+                insights.append(insight)
+                risk_factors.append(risk)
 
         analytics["situational_insights"] = {
             "key_insights": insights,
             "risk_factors": risk_factors,
-            "situation_summary": generate_situation_context(weather_ctx, traffic_ctx, env_ctx, awareness_score)
+            # Already built by calculate_situational_awareness; recompute only
+            # when that step failed and left nothing in state
+            "situation_summary": situational_awareness.get("situation_context")
+                                 or generate_situation_context(weather_ctx, traffic_ctx, env_ctx, awareness_score)
         }
 
         # Preprocessing impact analysis
@@ -699,13 +784,7 @@ def generate_derived_analytics(state: dict) -> Dict[str, Any]:
         }
 
     except Exception as e:
-        error_result = {
-            "status": "error",
-            "message": f"Analytics generation failed: {str(e)}",
-            "insights_generated": 0,
-            "recommendations_count": 0,
-            "quality_status": "ERROR"
-        }
+        error_result = {**_ANALYTICS_ERROR, "message": f"Analytics generation failed: {str(e)}"}
         state["analytics_error"] = error_result
         logger.error(f"Analytics generation failed: {e}")
         return error_result
@@ -723,26 +802,34 @@ def create_comprehensive_fusion_report(state: dict) -> Dict[str, Any]:
         cross_validation = safe_get_data_helper(state.get("cross_sensor_validation", {}))
         derived_analytics = safe_get_data_helper(state.get("derived_analytics", {}))
         quality_report = safe_get_data_helper(state.get("quality_report", {}))
+        # One clock reading serves both report timestamps
+        ts = datetime.now(timezone.utc).isoformat()
+
+        # Resolve each nested section once instead of re-walking .get() chains
+        has_quality = bool(quality_report)
+        processing_summary = quality_report.get("processing_summary", {}) if has_quality else {}
+        quality_assessment = derived_analytics.get("quality_assessment", _EMPTY)
+        correlation_analysis = cross_validation.get("correlation_analysis", _EMPTY)
 
         # Build comprehensive report structure
-        comprehensive_report = {
+        comprehensive_report: ComprehensiveReport = {
             "fused_environmental_state": {
                 "zone_id": fused_state.get("zone_id", "unknown"),
-                "timestamp_utc": datetime.now(timezone.utc).isoformat(),
+                "timestamp_utc": ts,
                 "weather_context": fused_state.get("weather_context", {}),
                 "traffic_context": fused_state.get("traffic_context", {}),
                 "environmental_context": fused_state.get("environmental_context", {})
             },
             "derived_analytics": {
                 "situational_awareness_score": situational_awareness.get("situational_awareness_score", 0.0),
-                "summary": situational_awareness.get("situation_context", {}).get("summary", "No context available"),
+                "summary": situational_awareness.get("situation_context", _EMPTY).get("summary", "No context available"),
                 "data_quality_check": {
-                    "status": derived_analytics.get("quality_assessment", {}).get("status", "UNKNOWN"),
-                    "notes": derived_analytics.get("quality_assessment", {}).get("notes", "No quality data available")
+                    "status": quality_assessment.get("status", "UNKNOWN"),
+                    "notes": quality_assessment.get("notes", "No quality data available")
                 },
                 "cross_sensor_validation": {
-                    "weather_iot_correlation": cross_validation.get("correlation_analysis", {}).get("weather_iot_correlation", {}),
-                    "traffic_environmental_impact": cross_validation.get("correlation_analysis", {}).get("traffic_environmental_impact", {})
+                    "weather_iot_correlation": correlation_analysis.get("weather_iot_correlation", {}),
+                    "traffic_environmental_impact": correlation_analysis.get("traffic_environmental_impact", {})
                 },
                 "preprocessing_impact_analysis": derived_analytics.get("preprocessing_impact", {})
             },
@@ -750,19 +837,18 @@ def create_comprehensive_fusion_report(state: dict) -> Dict[str, Any]:
                 "request_parameters": extracted_params,
                 "processing_pipeline": {
                     "data_collection_completed": True,
-                    "preprocessing_completed": bool(quality_report),
+                    "preprocessing_completed": has_quality,
                     "sensor_fusion_completed": True,
-                    "quality_assurance_applied": bool(quality_report)
+                    "quality_assurance_applied": has_quality
                 },
-                "data_quality_summary": quality_report.get("processing_summary", {}) if quality_report else {},
+                "data_quality_summary": processing_summary,
                 "fusion_statistics": {
-                    "sources_integrated": len([k for k in ["weather_context", "traffic_context", "environmental_context"]
-                                               if k in fused_state and fused_state[k]]),
-                    "correlations_analyzed": cross_validation.get("validation_statistics", {}).get("correlations_checked", 0),
-                    "insights_generated": len(derived_analytics.get("situational_insights", {}).get("key_insights", [])),
+                    "sources_integrated": _count_fused_sources(fused_state),
+                    "correlations_analyzed": cross_validation.get("validation_statistics", _EMPTY).get("correlations_checked", 0),
+                    "insights_generated": len(derived_analytics.get("situational_insights", _EMPTY).get("key_insights", ())),
                     "recommendations_provided": len(derived_analytics.get("recommendations", []))
                 },
-                "generation_timestamp": datetime.now(timezone.utc).isoformat()
+                "generation_timestamp": ts
             }
         }
 
@@ -779,11 +865,7 @@ def create_comprehensive_fusion_report(state: dict) -> Dict[str, Any]:
         }
 
     except Exception as e:
-        error_result = {
-            "status": "error",
-            "message": f"Fusion report generation failed: {str(e)}",
-            "fusion_complete": False
-        }
+        error_result = {**_REPORT_ERROR, "message": f"Fusion report generation failed: {str(e)}"}
         state["comprehensive_fusion_report_error"] = error_result
         logger.error(f"Comprehensive fusion report generation failed: {e}")
         return error_result
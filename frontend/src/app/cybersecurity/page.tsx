@@ -7,6 +7,7 @@ import CyberHeader from '@/components/cyber/CyberHeader';
 import AttackSimulator from '@/components/cyber/AttackSimulator';
 import ZoneStatusPanel from '@/components/cyber/ZoneStatusPanel';
 import LiveClockAndWeather from '@/components/analytics/LiveClockAndWeather';
+import { orderedFrameHandler } from '@/lib/wsFrames';
 
 // Dynamically import map
 const CyberMap = dynamic(() => import('@/components/cyber/CyberMap'), { 
@@ -73,15 +74,14 @@ export default function CybersecurityPage() {
     }
 
     const ws = new WebSocket('ws://localhost:8001/ws/updates');
+    ws.binaryType = 'arraybuffer';
     
     ws.onopen = () => {
       console.log('✅ Cyber WebSocket connected');
       setConnectionStatus('connected');
     };
 
-    ws.onmessage = (event) => {
-      const message = JSON.parse(event.data);
-      
+    ws.onmessage = orderedFrameHandler((message) => {
       if (message.type === 'cyber_alert' || message.type === 'cyber_update') {
         // Update zone security state in real-time
         setDashboardData(prev => {
@@ -89,7 +89,11 @@ export default function CybersecurityPage() {
           
           const updatedZones = prev.zones.map(zone => 
             zone.id === message.data.zone_id 
-              ? { ...zone, security_state: message.data.security_state }
+              ? {
+                  ...zone,
+                  security_state: message.data.security_state,
+                  threat_level: message.data.threat_level ?? zone.threat_level
+                }
               : zone
           );
           
@@ -98,10 +102,14 @@ export default function CybersecurityPage() {
 
         // Update selected zone if it's the affected one
         if (selectedZone?.id === message.data.zone_id) {
-          setSelectedZone(prev => prev ? { ...prev, security_state: message.data.security_state } : null);
+          setSelectedZone(prev => prev ? {
+            ...prev,
+            security_state: message.data.security_state,
+            threat_level: message.data.threat_level ?? prev.threat_level
+          } : null);
         }
       }
-    };
+    }, (error) => console.error('❌ Failed to parse Cyber WebSocket message:', error));
 
     ws.onclose = () => {
       console.log('🔌 Cyber WebSocket disconnected');
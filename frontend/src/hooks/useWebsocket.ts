@@ -1,7 +1,17 @@
 import { useEffect, useRef, useState, useCallback } from 'react';
 import { useDispatch } from 'react-redux';
 import { AppDispatch } from '@/lib/redux/store';
-import { setDashboardState, setLoading, setError } from '@/lib/redux/dashboardSlice';
+import {
+  setDashboardState,
+  setLoading,
+  setError,
+  applyPoleUpdate,
+  applyPoleAdded,
+  applyPoleRemoved,
+  applyBrightnessUpdate,
+  setAgentResult,
+} from '@/lib/redux/dashboardSlice';
+import { orderedFrameHandler } from '@/lib/wsFrames';
 
 const WEBSOCKET_URL = process.env.NEXT_PUBLIC_WEATHER_WS_URL || 'ws://localhost:8001/ws/updates';
 const RECONNECT_INTERVAL = 5000; // 5 seconds
@@ -38,6 +48,7 @@ export function useWebSocket() {
     setStatus('connecting');
 
     socketRef.current = new WebSocket(WEBSOCKET_URL);
+    socketRef.current.binaryType = 'arraybuffer';
 
     socketRef.current.onopen = () => {
       console.log('✅ WebSocket connection established');
@@ -45,21 +56,44 @@ export function useWebSocket() {
       reconnectAttemptsRef.current = 0;
     };
 
-    socketRef.current.onmessage = (event) => {
-      try {
-        const updatedState = JSON.parse(event.data);
+    socketRef.current.onmessage = orderedFrameHandler(
+      (updatedState) => {
+        // Delta messages patch the existing state instead of replacing it
+        if (updatedState.type === 'pole_update') {
+          dispatch(applyPoleUpdate(updatedState));
+          return;
+        }
+        if (updatedState.type === 'pole_added') {
+          dispatch(applyPoleAdded(updatedState));
+          return;
+        }
+        if (updatedState.type === 'pole_removed') {
+          dispatch(applyPoleRemoved(updatedState));
+          return;
+        }
+        if (updatedState.type === 'brightness_update') {
+          dispatch(applyBrightnessUpdate(updatedState));
+          if (updatedState.agentResult) {
+            dispatch(setAgentResult(updatedState.agentResult));
+          }
+          return;
+        }
+        if (updatedState.type === 'agent_result') {
+          dispatch(setAgentResult(updatedState.agentResult));
+          return;
+        }
 
         // FIXED: Handle simplified and consistent payload from backend
         dispatch(setDashboardState({
           zones: updatedState.zones,
           agentResult: updatedState.agentResult
         }));
-
-      } catch (error) {
+      },
+      (error) => {
         console.error('❌ Failed to parse WebSocket message:', error);
         dispatch(setError());
       }
-    };
+    );
 
     socketRef.current.onclose = () => {
       console.warn('🔌 WebSocket closed');
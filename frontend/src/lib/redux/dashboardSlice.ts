@@ -97,10 +97,63 @@ const dashboardSlice = createSlice({
         setError(state) {
             state.status = 'failed';
         },
+        // Delta message: a single pole changed (e.g. manual override)
+        applyPoleUpdate(state, action: PayloadAction<{ pole_id: string; brightness: number; manual_override: boolean }>) {
+            const { pole_id, brightness, manual_override } = action.payload;
+            for (const zone of state.zones) {
+                const pole = zone.poles.find(p => p.id === pole_id);
+                if (pole) {
+                    pole.brightness = brightness;
+                    pole.manual_override = manual_override;
+                    break;
+                }
+            }
+        },
+        // Delta message: a pole was added to a zone
+        applyPoleAdded(state, action: PayloadAction<{ zone_id: string; pole: LightPole }>) {
+            const zone = state.zones.find(z => z.id === action.payload.zone_id);
+            if (zone && !zone.poles.some(p => p.id === action.payload.pole.id)) {
+                zone.poles.push(action.payload.pole);
+            }
+        },
+        // Delta message: a pole was deleted
+        applyPoleRemoved(state, action: PayloadAction<{ pole_id: string }>) {
+            for (const zone of state.zones) {
+                const index = zone.poles.findIndex(p => p.id === action.payload.pole_id);
+                if (index !== -1) {
+                    zone.poles.splice(index, 1);
+                    break;
+                }
+            }
+        },
+        // Latest agent run, sent alongside simulation deltas
+        setAgentResult(state, action: PayloadAction<AgentResult>) {
+            state.latestAgentRun = action.payload;
+        },
+        // Delta message: the agent set the same brightness on a set of poles
+        applyBrightnessUpdate(state, action: PayloadAction<{ pole_ids: string[]; brightness: number }>) {
+            const ids = new Set(action.payload.pole_ids);
+            for (const zone of state.zones) {
+                for (const pole of zone.poles) {
+                    if (ids.has(pole.id)) {
+                        pole.brightness = action.payload.brightness;
+                    }
+                }
+            }
+        },
     },
 });
 
-export const { setLoading, setDashboardState, setError } = dashboardSlice.actions;
+export const {
+    setLoading,
+    setDashboardState,
+    setError,
+    applyPoleUpdate,
+    applyPoleAdded,
+    applyPoleRemoved,
+    applyBrightnessUpdate,
+    setAgentResult,
+} = dashboardSlice.actions;
 
 // --- NEW: ADDED SELECTORS ---
 
@@ -0,0 +1,20 @@
+// Binary frames from the backends are zlib-compressed JSON (compressed once
+// server-side and shared by every client); text frames are plain JSON.
+export async function parseFrame(data: string | ArrayBuffer): Promise<any> {
+  if (typeof data === 'string') {
+    return JSON.parse(data);
+  }
+  const stream = new Blob([data]).stream().pipeThrough(new DecompressionStream('deflate'));
+  return JSON.parse(await new Response(stream).text());
+}
+
+// Decompression is async, so frames are chained to keep them in arrival order.
+export function orderedFrameHandler(
+  handle: (message: any) => void,
+  onError: (error: unknown) => void,
+) {
+  let queue: Promise<void> = Promise.resolve();
+  return (event: MessageEvent) => {
+    queue = queue.then(() => parseFrame(event.data)).then(handle).catch(onError);
+  };
+}